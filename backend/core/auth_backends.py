@@ -4,6 +4,8 @@ from django.contrib.auth.backends import BaseBackend
 from teammates.models import User as Teammate
 from users.models import User as ClientUser
 
+from .principals import CLIENT, TEAMMATE
+
 
 class MultiUserBackend(BaseBackend):
     """
@@ -15,14 +17,14 @@ class MultiUserBackend(BaseBackend):
             return None
 
         try:
-            teammate = Teammate.objects.get(email=username)
+            teammate = Teammate.objects.by_email(username).get()
             if teammate.check_password(password):
                 return teammate
         except Teammate.DoesNotExist:
             pass
 
         try:
-            user = ClientUser.objects.get(email=username, status=ClientUser.ACTIVE)
+            user = ClientUser.objects.by_email(username).get(status=ClientUser.ACTIVE)
             if user.check_password(password):
                 return user
         except ClientUser.DoesNotExist:
@@ -30,16 +32,35 @@ class MultiUserBackend(BaseBackend):
 
         return None
 
-    def get_user(self, user_id):
-        Teammate = get_user_model()
-        try:
-            return Teammate.objects.get(pk=user_id)
-        except Teammate.DoesNotExist:
-            pass
+    def get_user(self, user_id, kind=None):
+        """
+        Load a teammate or client user by primary key.
 
-        try:
-            return ClientUser.objects.get(pk=user_id)
-        except ClientUser.DoesNotExist:
-            pass
+        `kind` is the principal kind claim from a JWT; when present only the
+        matching table is queried. Without it (legacy tokens, sessions) the
+        teammates table is tried first and the client table second.
+        """
+        if kind in (None, TEAMMATE):
+            Teammate = get_user_model()
+            try:
+                return Teammate.objects.get(pk=user_id)
+            except Teammate.DoesNotExist:
+                pass
+
+        if kind in (None, CLIENT):
+            try:
+                return ClientUser.objects.get(pk=user_id)
+            except ClientUser.DoesNotExist:
+                pass
 
         return None
+
+    def get_users(self, user_ids, kind):
+        """
+        Bulk counterpart of get_user for one table: a single IN query,
+        returning the found users keyed by str(pk)
+        """
+        if not user_ids:
+            return {}
+        model = ClientUser if kind == CLIENT else get_user_model()
+        return {str(user.pk): user for user in model.objects.filter(pk__in=user_ids)}
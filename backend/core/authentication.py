@@ -1,35 +1,120 @@
-from django.contrib.auth import get_user_model
+import copy
+from functools import cached_property
+
+from django.conf import settings
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken
 
 from users.models import User as ClientUser
 
+from .auth_backends import MultiUserBackend
+from .principals import PRINCIPAL_KIND_CLAIM, PRINCIPAL_KINDS
+from .revocation import revocation_filter
+from .user_cache import principal_cache
+
 
 class MultiUserJWTAuthentication(JWTAuthentication):
     """
     Custom JWT authentication that supports both teammate and client user models
+
+    Tokens carrying the principal kind claim are resolved against a single
+    table; legacy tokens fall back to trying teammates first, then clients.
+    Resolved users are kept in the in-process principal cache, so repeated
+    requests with the same token skip the database lookups entirely.
+    Revoked tokens are rejected from the in-memory revocation filter.
     """
 
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if revocation_filter.is_revoked(validated_token.payload):
+            raise InvalidToken("Token has been revoked")
+        return validated_token
+
     def get_user(self, validated_token):
         try:
             user_id = validated_token["user_id"]
         except KeyError:
             raise InvalidToken("Token contained no recognizable user identification")
 
-        TeammateUser = get_user_model()
-        try:
-            user = TeammateUser.objects.get(pk=user_id)
-            if user.is_active:
-                return user
-        except TeammateUser.DoesNotExist:
-            pass
+        user = principal_cache.get(str(user_id))
+        if user is None:
+            user = MultiUserBackend().get_user(
+                user_id, kind=validated_token.get(PRINCIPAL_KIND_CLAIM)
+            )
+            if user is None:
+                raise InvalidToken("User not found")
+            principal_cache.set(str(user_id), user)
 
-        try:
-            user = ClientUser.objects.get(pk=user_id)
-            if user.is_active:
-                return user
-        except ClientUser.DoesNotExist:
-            pass
+        if not user.is_active:
+            raise InvalidToken("User not found")
+
+        # Hand out a copy so views mutating request.user never touch the
+        # shared cached instance
+        return copy.copy(user)
+
+
+class TokenPrincipal:
+    """
+    Lightweight authenticated user built only from JWT claims
+
+    The full teammate/client model instance is loaded lazily through
+    `instance`, so views that only need identity never hit the database.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, validated_token):
+        self.id = validated_token["user_id"]
+        self.kind = validated_token[PRINCIPAL_KIND_CLAIM]
+        self.email = validated_token["email"]
+        self.name = validated_token["name"]
+        self.type = validated_token.get("type")
+        self.status = validated_token["status"]
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def is_active(self):
+        return self.status == ClientUser.ACTIVE
+
+    def get_full_name(self):
+        return self.name
+
+    @cached_property
+    def instance(self):
+        return MultiUserBackend().get_user(self.id, kind=self.kind)
+
+    def __str__(self):
+        return self.email
+
+
+class ClaimsJWTAuthentication(MultiUserJWTAuthentication):
+    """
+    Opt-in stateless JWT authentication for read-heavy endpoints
+
+    When settings.JWT_TRUST_CLAIMS is enabled, the request user is a
+    TokenPrincipal built from the token claims and no query is made. Claims
+    can be stale for at most ACCESS_TOKEN_LIFETIME, so deployments enabling it
+    should keep access tokens short-lived. Tokens issued before the identity
+    claims existed, or with the setting off, go through the regular lookup.
+    """
+
+    REQUIRED_CLAIMS = ("user_id", PRINCIPAL_KIND_CLAIM, "email", "name", "status")
+
+    def get_user(self, validated_token):
+        if not settings.JWT_TRUST_CLAIMS or not self.has_identity_claims(
+            validated_token
+        ):
+            return super().get_user(validated_token)
+
+        principal = TokenPrincipal(validated_token)
+        if principal.kind not in PRINCIPAL_KINDS or not principal.is_active:
+            raise InvalidToken("User not found")
+        return principal
 
-        raise InvalidToken("User not found")
+    def has_identity_claims(self, validated_token):
+        return all(claim in validated_token for claim in self.REQUIRED_CLAIMS)
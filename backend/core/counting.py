@@ -0,0 +1,95 @@
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def get_count_threshold():
+    return getattr(settings, "COUNT_ESTIMATE_THRESHOLD", 100000)
+
+
+def table_estimate(queryset):
+    """
+    Planner row estimate for the whole table (pg_class.reltuples), kept up
+    to date by VACUUM/ANALYZE. None if the table has never been analyzed.
+    """
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def plan_estimate(queryset):
+    """Rows the planner expects the query to return, from EXPLAIN"""
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(queryset):
+    """
+    PostgreSQL planner estimate of queryset.count(), None when there is
+    none (other backends, sliced or distinct querysets, planner errors).
+    Unfiltered querysets read the table statistics, filtered ones EXPLAIN
+    the query; neither scans any rows.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    query = queryset.query
+    if query.is_sliced or query.distinct or query.combinator:
+        return None
+    # Ordering changes neither the count nor the estimate, only the plan
+    queryset = queryset.order_by()
+    query = queryset.query
+    try:
+        if not query.where:
+            estimate = table_estimate(queryset)
+            if estimate is not None:
+                return estimate
+        return plan_estimate(queryset)
+    except (DatabaseError, KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def count_queryset(queryset, threshold=None):
+    """
+    (count, is_exact) for `queryset`. Estimates at or above `threshold` are
+    returned as they are, since COUNT(*) scans every matching row; smaller
+    ones are cheap to count exactly and are.
+    """
+    threshold = get_count_threshold() if threshold is None else threshold
+    estimate = estimate_count(queryset)
+    if estimate is not None and estimate >= threshold:
+        return estimate, False
+    return queryset.count(), True
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count is a planner estimate on large tables, so the
+    admin changelist does not run COUNT(*) over the whole result on every
+    page. `count_is_exact` tells whether the count was estimated.
+    """
+
+    count_threshold = None
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            self.count_is_exact = True
+            return len(self.object_list)
+        count, self.count_is_exact = count_queryset(
+            self.object_list, self.count_threshold
+        )
+        return count
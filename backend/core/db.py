@@ -0,0 +1,34 @@
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Connections opened (or checked out of the pool) by this process, per
+# alias. With persistent connections or a pool this stays far below the
+# number of requests served.
+connects = Counter()
+
+
+@receiver(connection_created)
+def count_connect(sender, connection, **kwargs):
+    connects[connection.alias] += 1
+
+
+def database_stats(alias=DEFAULT_DB_ALIAS):
+    """Connection reuse settings and counters, plus pool stats if pooled"""
+    connection = connections[alias]
+    stats = {
+        "vendor": connection.vendor,
+        "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+        "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+        "connects": connects[alias],
+        "pool": None,
+    }
+    # Only the PostgreSQL backend has a pool, when OPTIONS["pool"] is set.
+    # psycopg_pool stats include pool_size, pool_available,
+    # requests_waiting, requests_wait_ms and usage_ms.
+    pool = getattr(connection, "pool", None)
+    if pool is not None:
+        stats["pool"] = pool.get_stats()
+    return stats
@@ -0,0 +1,59 @@
+from contextlib import nullcontext
+
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models.functions import Lower
+
+from rest_framework import serializers
+
+
+def normalize_email(email):
+    """Canonical form used to compare emails: case and surrounding spaces ignored"""
+    return email.strip().lower()
+
+
+class EmailQuerySet(models.QuerySet):
+    """
+    Case-insensitive email lookups for the teammate and client user models
+
+    Filters on LOWER(email), which is exactly the expression of the unique
+    functional index on both tables, so each lookup is one index probe.
+    """
+
+    def by_email(self, email):
+        return self.alias(email_lower=Lower("email")).filter(
+            email_lower=normalize_email(email)
+        )
+
+    def by_emails(self, emails):
+        return self.alias(email_lower=Lower("email")).filter(
+            email_lower__in={normalize_email(email) for email in emails}
+        )
+
+
+def is_email_conflict(exc):
+    """Whether an IntegrityError comes from a unique constraint on email"""
+    diag = getattr(exc.__cause__, "diag", None)
+    # PostgreSQL names the constraint; SQLite only says which columns clashed
+    constraint = getattr(diag, "constraint_name", None) or str(exc)
+    return "email" in constraint
+
+
+def insert_with_unique_email(instance, message):
+    """
+    INSERT a new instance in one statement, letting the unique email
+    constraints decide instead of a prior exists() query (which costs a
+    round trip and still races with concurrent inserts). A clash is
+    raised as the same ValidationError the pre-check used to give.
+    """
+    using = router.db_for_write(type(instance), instance=instance)
+    # Inside a transaction a failed INSERT would poison it: use a
+    # savepoint there, and nothing extra in autocommit mode
+    in_transaction = connections[using].in_atomic_block
+    try:
+        with transaction.atomic(using=using) if in_transaction else nullcontext():
+            instance.save(force_insert=True, using=using)
+    except IntegrityError as exc:
+        if not is_email_conflict(exc):
+            raise
+        raise serializers.ValidationError({"email": [message]})
+    return instance
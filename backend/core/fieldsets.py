@@ -0,0 +1,102 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+EXCLUDE_PARAM = "exclude"
+
+
+def parse_field_list(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def select_fields(request, available):
+    """
+    Names from `available` kept by the request's ?fields= and ?exclude=
+    comma-separated lists, in declaration order. Unknown names are a 400 so
+    typos do not silently return everything.
+    """
+    include = parse_field_list(request.query_params.get(FIELDS_PARAM, ""))
+    exclude = parse_field_list(request.query_params.get(EXCLUDE_PARAM, ""))
+    unknown = [name for name in include + exclude if name not in available]
+    if unknown:
+        raise ValidationError({FIELDS_PARAM: f"Unknown fields: {', '.join(unknown)}"})
+    return [
+        name
+        for name in available
+        if (not include or name in include) and name not in exclude
+    ]
+
+
+def wants_sparse_fields(request):
+    return (
+        request is not None
+        and request.method in SAFE_METHODS
+        and (
+            FIELDS_PARAM in request.query_params
+            or EXCLUDE_PARAM in request.query_params
+        )
+    )
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that drops the fields not selected by ?fields= /
+    ?exclude= on read requests, so they are neither computed nor rendered.
+
+    `Meta.field_sources` maps fields that do not read one model field of the
+    same name (e.g. a SerializerMethodField) to the model fields they need;
+    get_model_fields() uses it to tell the view what to load with only().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if wants_sparse_fields(request):
+            selected = set(select_fields(request, list(self.fields)))
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+    @classmethod
+    def get_selected_fields(cls, request):
+        """Tuple of the selected field names, None when not narrowed"""
+        if not wants_sparse_fields(request):
+            return None
+        return tuple(select_fields(request, list(cls().fields)))
+
+    @classmethod
+    def get_model_fields(cls, request):
+        """Model fields read by the selected fields, None if not known"""
+        serializer = cls(context={"request": request})
+        sources = getattr(cls.Meta, "field_sources", {})
+        model_fields = []
+        for name, field in serializer.fields.items():
+            if name in sources:
+                model_fields.extend(sources[name])
+            elif field.source == "*" or "." in field.source:
+                return None
+            else:
+                model_fields.append(field.source)
+        return model_fields
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin narrowing the SELECT to the columns the sparse serializer
+    needs. `sparse_required_fields` are always loaded (e.g. the pagination
+    ordering), otherwise each row would fetch them separately.
+    """
+
+    sparse_required_fields = ("pk",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not wants_sparse_fields(self.request):
+            return queryset
+
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, SparseFieldsetMixin):
+            model_fields = serializer_class.get_model_fields(self.request)
+            if model_fields is not None:
+                queryset = queryset.only(*self.sparse_required_fields, *model_fields)
+        return queryset
@@ -0,0 +1,79 @@
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+# Password hasher work factors come from settings so the cost can be tuned
+# per host (see the benchmark_password_hashers command). They are read on
+# every use rather than at import, so a changed setting takes effect without
+# a restart of the hasher cache and existing hashes are upgraded on the next
+# successful login through must_update().
+
+
+class TunedArgon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with ARGON2_TIME_COST / MEMORY_COST (KiB) / PARALLELISM"""
+
+    @property
+    def time_cost(self):
+        return getattr(settings, "ARGON2_TIME_COST", 2)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, "ARGON2_MEMORY_COST", 102400)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "ARGON2_PARALLELISM", 8)
+
+
+def scrypt_maxmem(n, r):
+    # scrypt needs 128 * N * r bytes; OpenSSL's 32 MiB default cap would
+    # reject any work factor above 2**14
+    return 2 * 128 * n * r
+
+
+class TunedScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt with SCRYPT_WORK_FACTOR (N) / BLOCK_SIZE (r) / PARALLELISM (p)"""
+
+    @property
+    def work_factor(self):
+        return getattr(settings, "SCRYPT_WORK_FACTOR", 2**14)
+
+    @property
+    def block_size(self):
+        return getattr(settings, "SCRYPT_BLOCK_SIZE", 8)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "SCRYPT_PARALLELISM", 5)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # Same as Django's, except for maxmem: verify() passes the N and r
+        # stored in the hash, which can be above the configured cost after
+        # it was lowered, so the limit follows the parameters in use
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            maxmem=scrypt_maxmem(n, r),
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode("ascii").strip()
+        return "%s$%d$%s$%d$%d$%s" % (self.algorithm, n, salt, r, p, hash_)
+
+
+class TunedPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with PBKDF2_ITERATIONS, kept to verify existing hashes"""
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings, "PBKDF2_ITERATIONS", hashers.PBKDF2PasswordHasher.iterations
+        )
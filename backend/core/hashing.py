@@ -0,0 +1,240 @@
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from rest_framework.exceptions import APIException
+
+
+class HashingPoolBusy(APIException):
+    status_code = 503
+    default_detail = "Too many password operations in progress, try again shortly."
+    default_code = "hashing_pool_busy"
+
+
+def _init_worker():
+    # Workers start from the forkserver, not from this process: they get
+    # DJANGO_SETTINGS_MODULE from the environment and need setting up
+    import django
+
+    django.setup()
+
+
+def needs_rehash(encoded):
+    """Whether a stored hash uses an outdated hasher or outdated parameters"""
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = hashers.get_hasher("default")
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+class PasswordHashingPool:
+    """
+    Runs password hashing and verification on a dedicated process pool
+
+    Hashing is deliberately slow CPU work; running it in the request worker
+    lets a login burst starve every other endpoint. Here at most
+    `max_workers` hashes run at once, at most `max_pending` operations may be
+    running or queued, and anything beyond that fails fast with a 503
+    instead of piling up. With `max_workers=0` operations run inline in the
+    calling thread but are still bounded by `max_pending`.
+
+    An operation not finished within `timeout` seconds (queueing included)
+    also gets the 503. If a worker dies and breaks the pool, the pool is
+    replaced and the operation retried once.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, timeout=10):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Not fork: the pool starts lazily in a request thread of a
+                # process already running other threads (the last_login
+                # flush thread), and a forked child can inherit a lock one
+                # of them held at that moment and deadlock on it
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def shutdown(self):
+        """Stop the worker processes, if any were started"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def make_password(self, raw_password):
+        return self._run(hashers.make_password, raw_password)
+
+    def check_password(self, raw_password, encoded, setter=None):
+        """
+        Same contract as django.contrib.auth.hashers.check_password: when the
+        password is correct but the hash is outdated, `setter(raw_password)`
+        is called so the caller can store a fresh hash.
+        """
+        if raw_password is None or not encoded:
+            return False
+        is_correct = self._run(hashers.check_password, raw_password, encoded)
+        if is_correct and setter is not None and needs_rehash(encoded):
+            setter(raw_password)
+        return is_correct
+
+    def hash_many(self, raw_passwords):
+        """
+        make_password() for each password, in order, for bulk jobs. Passwords
+        go to the workers one at a time with at most `max_workers` in flight,
+        each holding a pending slot, so a login submitted meanwhile queues
+        behind at most one hash per worker and sees the same backpressure as
+        under any other load. A bulk job waits for a free slot instead of
+        failing with HashingPoolBusy.
+        """
+        raw_passwords = list(raw_passwords)
+        if self.max_workers <= 0:
+            hashed = []
+            for raw in raw_passwords:
+                with self._slot(block=True):
+                    hashed.append(hashers.make_password(raw))
+            return hashed
+
+        hashed = [None] * len(raw_passwords)
+        in_flight = {}
+        for index, raw in enumerate(raw_passwords):
+            if len(in_flight) >= self.max_workers:
+                self._collect(in_flight, hashed)
+            self._acquire(block=True)
+            try:
+                future = self._submit(hashers.make_password, raw)
+            except BaseException:
+                self._release()
+                raise
+            future.add_done_callback(lambda _: self._release())
+            in_flight[future] = index, raw
+        while in_flight:
+            self._collect(in_flight, hashed)
+        return hashed
+
+    def _collect(self, in_flight, hashed):
+        """Wait for at least one future and store the results of those done"""
+        done, _ = wait(in_flight, timeout=self.timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            self._timed_out()
+        for future in done:
+            index, raw = in_flight.pop(future)
+            try:
+                hashed[index] = future.result()
+            except BrokenProcessPool:
+                # The pool broke under the batch; redo this one on a new pool
+                with self._slot(block=True):
+                    hashed[index] = self._call(hashers.make_password, raw)
+
+    def _run(self, func, *args):
+        with self._slot():
+            if self.max_workers <= 0:
+                return func(*args)
+            return self._call(func, *args)
+
+    def _call(self, func, *args):
+        """func(*args) on a worker, retried once on a new pool if it breaks"""
+        for retry in (False, True):
+            executor = self.executor
+            try:
+                future = executor.submit(func, *args)
+                return future.result(timeout=self.timeout)
+            except BrokenProcessPool as exc:
+                self._discard_executor(executor)
+                if retry:
+                    raise HashingPoolBusy() from exc
+            except FuturesTimeout as exc:
+                future.cancel()
+                self._timed_out(exc)
+
+    def _submit(self, func, *args):
+        executor = self.executor
+        try:
+            return executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            return self.executor.submit(func, *args)
+
+    def _discard_executor(self, broken):
+        # A worker died (killed for memory, crashed) and took the pool with
+        # it; the next operation starts a new one
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _timed_out(self, exc=None):
+        with self._lock:
+            self.timeouts += 1
+        raise HashingPoolBusy() from exc
+
+    @contextmanager
+    def _slot(self, block=False):
+        self._acquire(block)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _acquire(self, block=False):
+        with self._slot_freed:
+            if block and self.max_pending > 0:
+                while self.pending >= self.max_pending:
+                    self._slot_freed.wait()
+            elif self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingPoolBusy()
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+
+    def _release(self):
+        with self._slot_freed:
+            self.pending -= 1
+            self.completed += 1
+            self._slot_freed.notify()
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+
+password_hashing_pool = PasswordHashingPool(
+    max_workers=getattr(settings, "PASSWORD_HASHING_WORKERS", 2),
+    max_pending=getattr(settings, "PASSWORD_HASHING_MAX_PENDING", 16),
+    timeout=getattr(settings, "PASSWORD_HASHING_TIMEOUT", 10),
+)
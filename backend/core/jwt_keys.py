@@ -0,0 +1,137 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+import jwt
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+
+class KeyRing:
+    """
+    Asymmetric JWT signing keys indexed by key id (kid)
+
+    Keys are PEM files named `<kid>.pem` in one directory. Private keys can
+    sign and verify; public keys only verify, which is how a retired key is
+    kept around until the tokens it signed have expired. `active_kid` picks
+    the key that signs new tokens.
+    """
+
+    def __init__(self, algorithm, keys=None, active_kid=None):
+        self.algorithm = algorithm
+        self._jws_algorithm = jwt.PyJWS().get_algorithm_by_name(algorithm)
+        self._private_keys = {}
+        self._public_keys = {}
+        for kid, pem in (keys or {}).items():
+            self.add_key(kid, pem)
+        self.active_kid = active_kid
+
+    @classmethod
+    def from_directory(cls, algorithm, directory, active_kid=None):
+        paths = sorted(Path(directory).glob("*.pem"))
+        keys = {path.stem: path.read_text() for path in paths}
+        return cls(algorithm, keys, active_kid)
+
+    def add_key(self, kid, pem):
+        key = self._jws_algorithm.prepare_key(pem)
+        if hasattr(key, "public_key"):
+            self._private_keys[kid] = key
+            key = key.public_key()
+        self._public_keys[kid] = key
+
+    def can_sign(self, kid):
+        return kid in self._private_keys
+
+    @property
+    def signing_key(self):
+        try:
+            return self._private_keys[self.active_kid]
+        except KeyError:
+            raise TokenBackendError(
+                f"No private key for the active JWT key id '{self.active_kid}'"
+            )
+
+    def get_verifying_key(self, kid):
+        try:
+            return self._public_keys[kid]
+        except KeyError:
+            raise TokenBackendError("Token is signed with an unknown key")
+
+    def jwks(self):
+        """Public keys as a JSON Web Key Set"""
+        keys = []
+        for kid, key in self._public_keys.items():
+            jwk = self._jws_algorithm.to_jwk(key, as_dict=True)
+            jwk.update({"kid": kid, "use": "sig", "alg": self.algorithm})
+            keys.append(jwk)
+        return {"keys": keys}
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    simplejwt token backend that signs with the key ring's active key, puts
+    its kid in the token header and verifies with the key named by that kid.
+    HMAC algorithms keep the stock single shared-secret behaviour.
+    """
+
+    def __init__(self, algorithm, keyring=None, **kwargs):
+        super().__init__(algorithm, **kwargs)
+        self.keyring = keyring
+
+    def encode(self, payload):
+        if self.keyring is None:
+            return super().encode(payload)
+
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+
+        return jwt.encode(
+            jwt_payload,
+            self.keyring.signing_key,
+            algorithm=self.algorithm,
+            headers={"kid": self.keyring.active_kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def get_verifying_key(self, token):
+        if self.keyring is None:
+            return super().get_verifying_key(token)
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
+            raise TokenBackendError("Token is invalid")
+        return self.keyring.get_verifying_key(header.get("kid"))
+
+
+def build_token_backend():
+    algorithm = api_settings.ALGORITHM
+    keyring = None
+    if not algorithm.startswith("HS"):
+        keyring = KeyRing.from_directory(
+            algorithm, settings.JWT_KEY_DIR, settings.JWT_ACTIVE_KID
+        )
+        if not keyring.can_sign(settings.JWT_ACTIVE_KID):
+            raise ImproperlyConfigured(
+                f"JWT_ACTIVE_KID '{settings.JWT_ACTIVE_KID}' has no private key "
+                f"in {settings.JWT_KEY_DIR}"
+            )
+
+    return KeyRingTokenBackend(
+        algorithm,
+        keyring=keyring,
+        signing_key=api_settings.SIGNING_KEY,
+        verifying_key=api_settings.VERIFYING_KEY,
+        audience=api_settings.AUDIENCE,
+        issuer=api_settings.ISSUER,
+        leeway=api_settings.LEEWAY,
+        json_encoder=api_settings.JSON_ENCODER,
+    )
+
+
+token_backend = build_token_backend()
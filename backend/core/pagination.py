@@ -0,0 +1,176 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.counting import count_queryset
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the values of the last row seen
+
+    Each page is a `WHERE (a, b) < (last_a, last_b) ORDER BY a DESC, b DESC
+    LIMIT n` query, so with an index on the ordering columns the cost of a
+    page does not depend on how deep the client is (unlike OFFSET). The last
+    ordering field must be unique so the position is never ambiguous.
+    Cursors are opaque base64 tokens holding the boundary row's values and
+    the direction; clients only follow the `next`/`previous` links.
+
+    `count` is the total number of matching rows, exact below
+    `count_threshold` and a planner estimate above it (`count_is_exact`
+    says which). It is computed for the first page only and carried in the
+    cursors, so following links never counts again; it is the count as of
+    the first page.
+    """
+
+    ordering = ("-id",)
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+    count_threshold = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip("-")) for name in self.ordering
+        ]
+
+        reverse, position, count = self.decode_cursor(request)
+        if count is None:
+            count = count_queryset(queryset, self.count_threshold)
+        self.count, self.count_is_exact = count
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(position, reverse))
+        order = [self.flip(name) if reverse else name for name in self.ordering]
+        rows = list(queryset.order_by(*order)[: self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Coming back from a later page guarantees there is a next one, and
+        # following a next link guarantees a previous one
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def flip(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+    def seek_filter(self, position, reverse):
+        """
+        Rows strictly after `position` in the (possibly reversed) ordering,
+        expanded to (a < x) OR (a = x AND b < y) since tuple comparison is
+        not portable across backends. The leading `a <= x` bound lets the
+        planner turn the OR into an index range scan.
+        """
+        names = [name.lstrip("-") for name in self.ordering]
+        lookups = [
+            "lt" if name.startswith("-") != reverse else "gt" for name in self.ordering
+        ]
+
+        condition = Q()
+        for index, (name, lookup) in enumerate(zip(names, lookups)):
+            equal = {names[i]: position[i] for i in range(index)}
+            condition |= Q(**equal, **{f"{name}__{lookup}": position[index]})
+        bound = {f"{names[0]}__{lookups[0]}e": position[0]}
+        return Q(**bound) & condition
+
+    def encode_cursor(self, row, reverse):
+        values = [self.cursor_value(field, row) for field in self.fields]
+        payload = json.dumps(
+            {
+                "r": int(reverse),
+                "p": values,
+                "c": self.count,
+                "e": int(self.count_is_exact),
+            },
+            separators=(",", ":"),
+        )
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    @staticmethod
+    def cursor_value(field, row):
+        # Rows may be model instances or values() dicts
+        if isinstance(row, dict):
+            value = row[field.attname]
+            return value.isoformat() if hasattr(value, "isoformat") else str(value)
+        return field.value_to_string(row)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return False, None, None
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = payload["p"]
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value) for field, value in zip(self.fields, values)
+            ]
+            count = None
+            if "c" in payload:
+                if not isinstance(payload["c"], int):
+                    raise ValueError
+                count = payload["c"], bool(payload["e"])
+            return bool(payload["r"]), position, count
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "count_is_exact": self.count_is_exact,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer"},
+                "count_is_exact": {"type": "boolean"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,15 @@
+from rest_framework.permissions import BasePermission
+
+from .principals import TEAMMATE, get_principal_kind
+
+
+class IsTeammate(BasePermission):
+    """Authenticated teammates only; client users get a 403"""
+
+    message = "Only teammates can access this endpoint."
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated and get_principal_kind(user) == TEAMMATE
+        )
@@ -0,0 +1,27 @@
+from users.models import User as ClientUser
+
+# Signed claim telling which table the token's user_id belongs to
+PRINCIPAL_KIND_CLAIM = "kind"
+
+TEAMMATE = "teammate"
+CLIENT = "client"
+
+PRINCIPAL_KINDS = (TEAMMATE, CLIENT)
+
+
+def get_principal_kind(user):
+    """Return the principal kind claim value for a teammate or client user"""
+    # Token principals carry the kind they were built from
+    kind = getattr(user, "kind", None)
+    if kind in PRINCIPAL_KINDS:
+        return kind
+    if isinstance(user, ClientUser):
+        return CLIENT
+    return TEAMMATE
+
+
+def get_display_name(user):
+    """Teammates have a single name field, client users first/last names"""
+    if isinstance(user, ClientUser):
+        return user.get_full_name()
+    return user.name
@@ -0,0 +1,181 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from users.models import RevokedToken, TokenRevocationWatermark
+
+
+def token_lifetime():
+    """The longest a token stays valid; older watermarks cannot reject any"""
+    return max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+
+
+class RevocationFilter:
+    """
+    Per-worker in-memory view of revoked tokens
+
+    Holds the revoked jtis (with their expiry, so they can be dropped once
+    the token is dead anyway) and the per-user "not before" watermarks as
+    epoch seconds, dropped once every token they could reject has expired.
+    Lookups never touch the database; the sets are refreshed incrementally
+    from the revocation tables at most every `sync_interval` seconds.
+    Revocations made by this worker are applied immediately.
+    """
+
+    def __init__(self, sync_interval=5):
+        self.sync_interval = sync_interval
+        self._jtis = {}
+        self._watermarks = {}
+        self._synced_at = None
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+        self.syncs = 0
+        self.revoked_hits = 0
+
+    def is_revoked(self, payload):
+        self.maybe_sync()
+
+        jti = payload.get(api_settings.JTI_CLAIM)
+        if jti is not None and jti in self._jtis:
+            self.revoked_hits += 1
+            return True
+
+        not_before = self._watermarks.get(str(payload.get("user_id")))
+        # Tokens issued within the same second as the watermark stay valid,
+        # so fresh tokens handed out right after a revocation keep working
+        if not_before is not None and payload.get("iat", 0) < not_before:
+            self.revoked_hits += 1
+            return True
+        return False
+
+    def maybe_sync(self):
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+
+    def sync(self):
+        """
+        Pull revocations recorded since the last sync (by any worker). The
+        window overlaps the previous one so rows committed late are not
+        missed; re-applying a revocation is harmless.
+        """
+        with self._lock:
+            now = timezone.now()
+            if self._synced_at is None:
+                # Watermarks older than the token lifetime cannot affect a
+                # live token, and expired jtis do not need to be remembered
+                jti_rows = RevokedToken.objects.filter(expires_at__gt=now)
+                watermark_rows = TokenRevocationWatermark.objects.filter(
+                    not_before__gt=now - token_lifetime()
+                )
+            else:
+                since = self._synced_at - timedelta(seconds=self.sync_interval)
+                jti_rows = RevokedToken.objects.filter(revoked_at__gte=since)
+                watermark_rows = TokenRevocationWatermark.objects.filter(
+                    updated_at__gte=since
+                )
+
+            for jti, expires_at in jti_rows.values_list("jti", "expires_at"):
+                self._jtis[jti] = expires_at.timestamp()
+            for user_id, not_before in watermark_rows.values_list(
+                "user_id", "not_before"
+            ):
+                self._add_watermark(str(user_id), not_before)
+
+            self._discard_expired(now.timestamp())
+            self._synced_at = now
+            self._next_sync = time.monotonic() + self.sync_interval
+            self.syncs += 1
+
+    def add_jti(self, jti, expires_at):
+        with self._lock:
+            self._jtis[jti] = expires_at.timestamp()
+
+    def add_watermark(self, user_id, not_before):
+        self.add_watermarks([user_id], not_before)
+
+    def add_watermarks(self, user_ids, not_before):
+        with self._lock:
+            for user_id in user_ids:
+                self._add_watermark(str(user_id), not_before)
+
+    def _add_watermark(self, user_id, not_before):
+        epoch = int(not_before.timestamp())
+        if epoch > self._watermarks.get(user_id, 0):
+            self._watermarks[user_id] = epoch
+
+    def _discard_expired(self, now):
+        expired = [jti for jti, exp in self._jtis.items() if exp <= now]
+        for jti in expired:
+            del self._jtis[jti]
+
+        # A token issued before the watermark has expired once a full token
+        # lifetime has passed since it
+        horizon = now - token_lifetime().total_seconds()
+        stale = [
+            user_id for user_id, epoch in self._watermarks.items() if epoch <= horizon
+        ]
+        for user_id in stale:
+            del self._watermarks[user_id]
+
+    def reset(self):
+        with self._lock:
+            self._jtis.clear()
+            self._watermarks.clear()
+            self._synced_at = None
+            self._next_sync = 0.0
+
+    def stats(self):
+        return {
+            "revoked_jtis": len(self._jtis),
+            "watermarks": len(self._watermarks),
+            "sync_interval": self.sync_interval,
+            "syncs": self.syncs,
+            "revoked_hits": self.revoked_hits,
+            "synced_at": self._synced_at.isoformat() if self._synced_at else None,
+        }
+
+
+revocation_filter = RevocationFilter(
+    sync_interval=getattr(settings, "TOKEN_REVOCATION_SYNC_INTERVAL", 5)
+)
+
+
+def revoke_token(token):
+    """Revoke a single access or refresh token by its jti"""
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime_from_epoch(token["exp"])
+    RevokedToken.objects.get_or_create(
+        jti=jti,
+        defaults={"user_id": token.get("user_id"), "expires_at": expires_at},
+    )
+    revocation_filter.add_jti(jti, expires_at)
+
+
+def revoke_user_tokens(user_id):
+    """Invalidate every token issued to the user before now"""
+    now = timezone.now()
+    TokenRevocationWatermark.objects.update_or_create(
+        user_id=user_id, defaults={"not_before": now, "updated_at": now}
+    )
+    revocation_filter.add_watermark(user_id, now)
+
+
+def revoke_users_tokens(user_ids):
+    """revoke_user_tokens() for many users with one upsert"""
+    now = timezone.now()
+    TokenRevocationWatermark.objects.bulk_create(
+        [
+            TokenRevocationWatermark(user_id=user_id, not_before=now, updated_at=now)
+            for user_id in user_ids
+        ],
+        update_conflicts=True,
+        unique_fields=["user_id"],
+        update_fields=["not_before", "updated_at"],
+    )
+    revocation_filter.add_watermarks(user_ids, now)
@@ -14,6 +14,8 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 
@@ -90,6 +93,21 @@ WSGI_APPLICATION = "core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections are reused across requests instead of paying a TCP + auth
+# handshake per request. Without a pool each worker thread keeps its own
+# connection for DB_CONN_MAX_AGE seconds (0 = close after every request);
+# health checks ping a reused connection before handing it to a request.
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool)
+# DB_POOL=True shares a psycopg 3 connection pool between a process's
+# threads instead (health checks then run on checkout). A request waits up
+# to DB_POOL_TIMEOUT seconds for a free connection before failing.
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+DB_POOL_MIN_SIZE = config("DB_POOL_MIN_SIZE", default=2, cast=int)
+DB_POOL_MAX_SIZE = config("DB_POOL_MAX_SIZE", default=10, cast=int)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", default=10, cast=float)
+DB_POOL_MAX_IDLE = config("DB_POOL_MAX_IDLE", default=600, cast=float)
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -98,6 +116,21 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD", default="core"),
         "HOST": config("DB_HOST", default="db"),
         "PORT": config("DB_PORT", default="5432"),
+        # The pool manages connection lifetime itself
+        "CONN_MAX_AGE": 0 if DB_POOL else DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+        "OPTIONS": (
+            {
+                "pool": {
+                    "min_size": DB_POOL_MIN_SIZE,
+                    "max_size": DB_POOL_MAX_SIZE,
+                    "timeout": DB_POOL_TIMEOUT,
+                    "max_idle": DB_POOL_MAX_IDLE,
+                }
+            }
+            if DB_POOL
+            else {}
+        ),
     }
 }
 
@@ -121,6 +154,72 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashers. PASSWORD_HASHER picks the one used for new hashes; the
+# others stay listed so existing hashes still verify and are upgraded to the
+# preferred hasher and current cost on the next successful login. Pick the
+# cost with `manage.py benchmark_password_hashers --target-ms ...`.
+PASSWORD_HASHER_CLASSES = {
+    "argon2": "core.hashers.TunedArgon2PasswordHasher",
+    "scrypt": "core.hashers.TunedScryptPasswordHasher",
+    "pbkdf2": "core.hashers.TunedPBKDF2PasswordHasher",
+}
+PASSWORD_HASHER = config("PASSWORD_HASHER", default="argon2")
+if PASSWORD_HASHER not in PASSWORD_HASHER_CLASSES:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER must be one of {', '.join(PASSWORD_HASHER_CLASSES)}"
+    )
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(
+        path
+        for name, path in PASSWORD_HASHER_CLASSES.items()
+        if name != PASSWORD_HASHER
+    ),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+ARGON2_TIME_COST = config("ARGON2_TIME_COST", default=2, cast=int)
+ARGON2_MEMORY_COST = config("ARGON2_MEMORY_COST", default=102400, cast=int)
+ARGON2_PARALLELISM = config("ARGON2_PARALLELISM", default=8, cast=int)
+SCRYPT_WORK_FACTOR = config("SCRYPT_WORK_FACTOR", default=2**14, cast=int)
+SCRYPT_BLOCK_SIZE = config("SCRYPT_BLOCK_SIZE", default=8, cast=int)
+SCRYPT_PARALLELISM = config("SCRYPT_PARALLELISM", default=5, cast=int)
+PBKDF2_ITERATIONS = config("PBKDF2_ITERATIONS", default=1000000, cast=int)
+
+# Paginated counts at or above this many rows use the PostgreSQL planner
+# estimate instead of COUNT(*) (API pages and the admin changelists)
+COUNT_ESTIMATE_THRESHOLD = config("COUNT_ESTIMATE_THRESHOLD", default=100000, cast=int)
+
+# Default and maximum page size of the cursor-paginated user list
+USER_LIST_PAGE_SIZE = config("USER_LIST_PAGE_SIZE", default=50, cast=int)
+USER_LIST_MAX_PAGE_SIZE = config("USER_LIST_MAX_PAGE_SIZE", default=500, cast=int)
+
+# Rows fetched per round trip by the streaming user export
+USER_EXPORT_CHUNK_SIZE = config("USER_EXPORT_CHUNK_SIZE", default=2000, cast=int)
+# Rows validated, deduplicated and inserted together by the bulk user import
+USER_IMPORT_CHUNK_SIZE = config("USER_IMPORT_CHUNK_SIZE", default=1000, cast=int)
+# Upper bound on the ids accepted by the bulk status endpoint (filters have none)
+USER_BULK_STATUS_MAX_IDS = config("USER_BULK_STATUS_MAX_IDS", default=10000, cast=int)
+# Users locked and updated per transaction by a bulk status change
+USER_BULK_STATUS_CHUNK_SIZE = config(
+    "USER_BULK_STATUS_CHUNK_SIZE", default=1000, cast=int
+)
+
+# last_login updates are buffered per worker and written in one bulk UPDATE
+# once FLUSH_SIZE users are pending or FLUSH_INTERVAL seconds have passed
+LAST_LOGIN_FLUSH_SIZE = config("LAST_LOGIN_FLUSH_SIZE", default=100, cast=int)
+LAST_LOGIN_FLUSH_INTERVAL = config("LAST_LOGIN_FLUSH_INTERVAL", default=5, cast=int)
+LAST_LOGIN_FLUSH_THREAD = config("LAST_LOGIN_FLUSH_THREAD", default=True, cast=bool)
+
+# Password hashing runs on a per-worker process pool (core/hashing.py).
+# Requests beyond MAX_PENDING concurrent hash operations, or waiting more
+# than TIMEOUT seconds for one, get a 503.
+PASSWORD_HASHING_WORKERS = config("PASSWORD_HASHING_WORKERS", default=2, cast=int)
+PASSWORD_HASHING_MAX_PENDING = config(
+    "PASSWORD_HASHING_MAX_PENDING", default=16, cast=int
+)
+PASSWORD_HASHING_TIMEOUT = config("PASSWORD_HASHING_TIMEOUT", default=10, cast=float)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -159,18 +258,42 @@ AUTHENTICATION_BACKENDS = [
     "core.auth_backends.MultiUserBackend",  # Custom backend for multi-user auth
 ]
 
+# Stateless "claims-trusted" authentication for opted-in read endpoints
+# (core.authentication.ClaimsJWTAuthentication). Claims may be stale for up to
+# the access token lifetime, so enabling it defaults to short-lived tokens.
+JWT_TRUST_CLAIMS = config("JWT_TRUST_CLAIMS", default=False, cast=bool)
+ACCESS_TOKEN_LIFETIME_MINUTES = config(
+    "ACCESS_TOKEN_LIFETIME_MINUTES", default=5 if JWT_TRUST_CLAIMS else 60, cast=int
+)
+
+# JWT signing. HS256 signs with SECRET_KEY; RS256/ES256/EdDSA sign with the
+# key ring in JWT_KEY_DIR (one `<kid>.pem` per key, see core/jwt_keys.py) and
+# publish the public keys at /.well-known/jwks.json
+JWT_ALGORITHM = config("JWT_ALGORITHM", default="HS256")
+JWT_KEY_DIR = config("JWT_KEY_DIR", default=str(BASE_DIR / "keys"))
+JWT_ACTIVE_KID = config("JWT_ACTIVE_KID", default="")
+
 # JWT Settings
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=ACCESS_TOKEN_LIFETIME_MINUTES),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
-    "ALGORITHM": "HS256",
+    "ALGORITHM": JWT_ALGORITHM,
     "SIGNING_KEY": SECRET_KEY,
     "VERIFYING_KEY": None,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "USER_ID_FIELD": "id",
     "USER_ID_CLAIM": "user_id",
+    "AUTH_TOKEN_CLASSES": ("core.tokens.AccessToken",),
+    "TOKEN_OBTAIN_SERIALIZER": "users.jwt_serializers.CustomTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.jwt_serializers.CustomTokenRefreshSerializer",
 }
 
+# How often each worker pulls new revocations into its in-memory filter
+# (core/revocation.py), in seconds
+TOKEN_REVOCATION_SYNC_INTERVAL = config(
+    "TOKEN_REVOCATION_SYNC_INTERVAL", default=5, cast=int
+)
+
 
 INTERNAL_JWT_SECRET_KEY = config(
     "INTERNAL_JWT_SECRET_KEY", default="any-default-value"
@@ -178,3 +301,29 @@ INTERNAL_JWT_SECRET_KEY = config(
 INTERNAL_JWT_ALLOWED_SERVICES = config(
     "INTERNAL_JWT_ALLOWED_SERVICES", default="any,default,value"
 ).split(",")
+# Verified service tokens are cached until their exp (capped by MAX_TTL),
+# rejected ones for FAILURE_TTL seconds in a separate cache of
+# FAILURE_CACHE_MAX_SIZE entries (users/middleware.py)
+INTERNAL_JWT_CACHE_MAX_SIZE = config(
+    "INTERNAL_JWT_CACHE_MAX_SIZE", default=1024, cast=int
+)
+INTERNAL_JWT_CACHE_MAX_TTL = config("INTERNAL_JWT_CACHE_MAX_TTL", default=300, cast=int)
+INTERNAL_JWT_CACHE_FAILURE_TTL = config(
+    "INTERNAL_JWT_CACHE_FAILURE_TTL", default=5, cast=int
+)
+INTERNAL_JWT_FAILURE_CACHE_MAX_SIZE = config(
+    "INTERNAL_JWT_FAILURE_CACHE_MAX_SIZE", default=256, cast=int
+)
+# Read-through cache of the internal by-email lookup (users/lookup_cache.py);
+# "not found" answers are cached for the shorter NEGATIVE_TTL
+USER_LOOKUP_CACHE_MAX_SIZE = config(
+    "USER_LOOKUP_CACHE_MAX_SIZE", default=4096, cast=int
+)
+USER_LOOKUP_CACHE_TTL = config("USER_LOOKUP_CACHE_TTL", default=60, cast=int)
+USER_LOOKUP_NEGATIVE_TTL = config("USER_LOOKUP_NEGATIVE_TTL", default=10, cast=int)
+# Upper bound on the number of items accepted by internal batch endpoints
+INTERNAL_BATCH_MAX_ITEMS = config("INTERNAL_BATCH_MAX_ITEMS", default=100, cast=int)
+
+# In-process cache of authenticated users (core/user_cache.py)
+USER_CACHE_MAX_SIZE = config("USER_CACHE_MAX_SIZE", default=10000, cast=int)
+USER_CACHE_TTL = config("USER_CACHE_TTL", default=60, cast=int)
@@ -42,6 +42,12 @@ MIGRATION_MODULES = DisableMigrations()
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
+# Hash inline, MD5 is cheap enough not to need the process pool
+PASSWORD_HASHING_WORKERS = 0
+
+# Sync the token revocation filter only when a test asks for it, so query
+# counts stay deterministic
+TOKEN_REVOCATION_SYNC_INTERVAL = 3600
 
 # Disable logging during tests
 LOGGING_CONFIG = None
@@ -49,3 +55,8 @@ LOGGING_CONFIG = None
 # Test-specific settings
 DEBUG = False
 TEMPLATE_DEBUG = False
+
+# Write last_login through on every login so tests can assert on it
+LAST_LOGIN_FLUSH_SIZE = 1
+LAST_LOGIN_FLUSH_INTERVAL = 0
+LAST_LOGIN_FLUSH_THREAD = False
@@ -1,8 +1,37 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
 from django.urls import reverse
 
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from users.jwt_serializers import CustomTokenObtainPairSerializer
+from users.models import User as ClientUser
+
+from .db import database_stats
+from .hashing import HashingPoolBusy, PasswordHashingPool, password_hashing_pool
+from .ids import uuid7, uuid7_timestamp
+from .jwt_keys import KeyRing, KeyRingTokenBackend, token_backend
+from .lru_cache import LRUTTLCache
+from .principals import CLIENT, PRINCIPAL_KIND_CLAIM, TEAMMATE
+from .revocation import revocation_filter
+from .user_cache import principal_cache
 
 User = get_user_model()
 
@@ -52,6 +81,35 @@ class TokenAPITestCase(APITestCase):
         self.assertTrue(len(response.data["access"]) > 0)
         self.assertTrue(len(response.data["refresh"]) > 0)
 
+    def test_obtain_token_includes_principal_kind(self):
+        """Test issued tokens say which table the user belongs to"""
+        data = {
+            "email": self.user_data["email"],
+            "password": self.user_data["password"],
+        }
+
+        response = self.client.post(self.token_url, data)
+
+        # Assert both tokens carry the teammate kind claim
+        access = AccessToken(response.data["access"])
+        refresh = RefreshToken(response.data["refresh"])
+        self.assertEqual(access[PRINCIPAL_KIND_CLAIM], TEAMMATE)
+        self.assertEqual(refresh[PRINCIPAL_KIND_CLAIM], TEAMMATE)
+        self.assertEqual(access["status"], ClientUser.ACTIVE)
+
+    def test_obtain_token_email_case_insensitive(self):
+        """Test teammates can obtain tokens whatever casing they type"""
+        data = {
+            "email": self.user_data["email"].upper(),
+            "password": self.user_data["password"],
+        }
+
+        response = self.client.post(self.token_url, data)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+
     def test_obtain_token_invalid_credentials(self):
         """Test token generation fails with invalid credentials"""
         data = {"email": self.user_data["email"], "password": "wrongpassword"}
@@ -145,3 +203,438 @@ class TokenAPITestCase(APITestCase):
 
         # Assert response
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class PrincipalCacheTestCase(APITestCase):
+    """Test cases for the in-process cache used by JWT authentication"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Print test group message"""
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR PRINCIPAL CACHE")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up test data before each test"""
+        principal_cache.clear()
+        revocation_filter.sync()
+        self.validate_token_url = "/api/users/validate-token/"
+        self.client_user = ClientUser.objects.create(
+            email="client@example.com", first_name="Client", last_name="User"
+        )
+        refresh = RefreshToken.for_user(self.client_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+    def test_second_request_skips_database(self):
+        """Test client users are resolved from the cache after the first request"""
+        response = self.client.get(self.validate_token_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        hits = principal_cache.hits
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.validate_token_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(principal_cache.hits - hits, 1)
+
+    def test_client_kind_claim_needs_single_lookup(self):
+        """Test tokens with the client kind skip the teammates table"""
+        refresh = CustomTokenObtainPairSerializer.get_token(self.client_user)
+        self.assertEqual(refresh[PRINCIPAL_KIND_CLAIM], CLIENT)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.validate_token_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user_type"], "client")
+
+    def test_legacy_token_without_kind_still_works(self):
+        """Test tokens issued before the kind claim fall back to both tables"""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.validate_token_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_save_invalidates_cached_user(self):
+        """Test deactivating a user evicts it so the token stops working"""
+        response = self.client.get(self.validate_token_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client_user.status = ClientUser.INACTIVE
+        self.client_user.save()
+
+        response = self.client.get(self.validate_token_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_delete_invalidates_cached_teammate(self):
+        """Test deleting a teammate evicts it from the cache"""
+        teammate = User.objects.create_user(
+            email="teammate@example.com", name="Teammate", password="password123"
+        )
+        refresh = RefreshToken.for_user(teammate)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.client.get(self.validate_token_url)
+        self.assertEqual(len(principal_cache), 1)
+
+        teammate.delete()
+
+        # Assert cache entry was removed
+        self.assertEqual(len(principal_cache), 0)
+
+    def test_lru_eviction_and_ttl(self):
+        """Test the cache evicts least recently used and expired entries"""
+        cache = LRUTTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        # Assert "b" was the least recently used entry
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache.set("d", 4, ttl=0)
+        self.assertIsNone(cache.get("d"))
+
+
+def generate_rsa_pem():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+class KeyRingTestCase(APITestCase):
+    """Test cases for asymmetric token signing and the JWKS endpoint"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Print test group message"""
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR JWT KEY RING")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up a key ring with two RSA keys"""
+        self.keyring = KeyRing(
+            "RS256", {"2024-01": generate_rsa_pem(), "2024-02": generate_rsa_pem()}
+        )
+        self.keyring.active_kid = "2024-01"
+        self.backend = KeyRingTokenBackend("RS256", keyring=self.keyring)
+        self.jwks_url = reverse("jwks")
+
+    def test_tokens_carry_active_kid(self):
+        """Test tokens are signed with the active key and name it in the header"""
+        token = self.backend.encode({"user_id": "abc"})
+
+        # Assert header and round trip
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], "2024-01")
+        self.assertEqual(self.backend.decode(token)["user_id"], "abc")
+
+    def test_rotated_key_still_verifies_old_tokens(self):
+        """Test tokens signed before a rotation stay valid"""
+        old_token = self.backend.encode({"user_id": "abc"})
+        self.keyring.active_kid = "2024-02"
+        new_token = self.backend.encode({"user_id": "abc"})
+
+        # Assert both tokens verify with their own keys
+        self.assertEqual(jwt.get_unverified_header(new_token)["kid"], "2024-02")
+        self.assertEqual(self.backend.decode(old_token)["user_id"], "abc")
+        self.assertEqual(self.backend.decode(new_token)["user_id"], "abc")
+
+    def test_unknown_kid_is_rejected(self):
+        """Test tokens signed by a key outside the ring fail verification"""
+        other = KeyRing("RS256", {"rogue": generate_rsa_pem()}, active_kid="rogue")
+        token = KeyRingTokenBackend("RS256", keyring=other).encode({"user_id": "a"})
+
+        with self.assertRaises(TokenBackendError):
+            self.backend.decode(token)
+
+    def test_jwks_lists_public_keys(self):
+        """Test the JWKS endpoint publishes every public key"""
+        with mock.patch.object(token_backend, "keyring", self.keyring):
+            response = self.client.get(self.jwks_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("max-age=3600", response["Cache-Control"])
+        keys = response.json()["keys"]
+        self.assertEqual({key["kid"] for key in keys}, {"2024-01", "2024-02"})
+        self.assertTrue(all("d" not in key for key in keys))
+
+        # Assert a consumer can verify a token with the published key
+        token = self.backend.encode({"user_id": "abc"})
+        public_key = jwt.PyJWK(keys[0]).key
+        payload = jwt.decode(token, public_key, algorithms=["RS256"])
+        self.assertEqual(payload["user_id"], "abc")
+
+    def test_jwks_empty_for_hmac(self):
+        """Test no key material is published while tokens use HS256"""
+        response = self.client.get(self.jwks_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"keys": []})
+
+
+class PasswordHashingPoolTestCase(APITestCase):
+    """Test cases for the bounded password hashing pool"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Print test group message"""
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR PASSWORD HASHING POOL")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up a client user"""
+        self.user = ClientUser.objects.create(
+            email="hash@example.com", first_name="Hash", last_name="Pool"
+        )
+        self.user.set_password("securepass123")
+        self.user.save()
+
+    def test_round_trip_on_worker_process(self):
+        """Test hashes made on a worker process verify"""
+        pool = PasswordHashingPool(max_workers=1, max_pending=4)
+        try:
+            encoded = pool.make_password("securepass123")
+
+            # Assert hash verifies and is not the raw password
+            self.assertNotEqual(encoded, "securepass123")
+            self.assertTrue(pool.check_password("securepass123", encoded))
+            self.assertFalse(pool.check_password("wrongpass", encoded))
+        finally:
+            pool.executor.shutdown()
+        self.assertEqual(pool.stats()["completed"], 3)
+        self.assertEqual(pool.stats()["pending"], 0)
+
+    def test_hash_many_on_worker_processes(self):
+        """Test a batch is hashed in order, one slot per password in flight"""
+        pool = PasswordHashingPool(max_workers=2, max_pending=16)
+        passwords = [f"securepass{i}" for i in range(10)]
+        try:
+            encoded = pool.hash_many(passwords)
+        finally:
+            pool.executor.shutdown()
+
+        # Assert one hash per password, in order, never more than one per worker
+        self.assertEqual(len(encoded), 10)
+        for raw, hashed in zip(passwords, encoded):
+            self.assertTrue(check_password(raw, hashed))
+        self.assertEqual(pool.stats()["completed"], 10)
+        self.assertLessEqual(pool.stats()["peak_pending"], 2)
+        self.assertEqual(pool.stats()["pending"], 0)
+
+    def test_hash_many_waits_for_a_slot(self):
+        """Test a batch waits for a free slot instead of failing"""
+        pool = PasswordHashingPool(max_workers=0, max_pending=1)
+        pool._acquire()
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(pool.hash_many(["securepass123"]))
+        )
+        thread.start()
+        thread.join(0.2)
+
+        # Assert the batch is still waiting, then finishes once the slot frees
+        self.assertTrue(thread.is_alive())
+        pool._release()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(check_password("securepass123", result[0][0]))
+        self.assertEqual(pool.stats()["rejected"], 0)
+
+    def test_broken_pool_is_replaced(self):
+        """Test a pool broken by a dead worker is rebuilt and the call retried"""
+        pool = PasswordHashingPool(max_workers=1, max_pending=4)
+        try:
+            broken = pool.executor
+            with self.assertRaises(BrokenProcessPool):
+                broken.submit(os._exit, 1).result(timeout=10)
+
+            encoded = pool.make_password("securepass123")
+
+            # Assert the hash was made on a new pool
+            self.assertTrue(check_password("securepass123", encoded))
+            self.assertIsNot(pool.executor, broken)
+            self.assertEqual(pool.stats()["restarts"], 1)
+        finally:
+            pool.executor.shutdown()
+
+    def test_slow_operation_times_out(self):
+        """Test an operation exceeding the timeout fails fast with a 503"""
+        pool = PasswordHashingPool(max_workers=1, max_pending=4, timeout=0.1)
+        try:
+            with self.assertRaises(HashingPoolBusy):
+                pool._run(time.sleep, 1)
+        finally:
+            pool.executor.shutdown()
+
+        # Assert the timeout is counted and the slot released
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        self.assertEqual(pool.stats()["pending"], 0)
+
+    def test_full_pool_rejects(self):
+        """Test operations beyond max_pending fail fast"""
+        pool = PasswordHashingPool(max_workers=0, max_pending=0)
+
+        with self.assertRaises(HashingPoolBusy):
+            pool.make_password("securepass123")
+
+        # Assert rejection is counted
+        self.assertEqual(pool.stats()["rejected"], 1)
+
+    def test_login_returns_503_when_pool_is_full(self):
+        """Test logins are shed with a 503 while the pool is saturated"""
+        rejected = password_hashing_pool.rejected
+        with mock.patch.object(password_hashing_pool, "max_pending", 0):
+            response = self.client.post(
+                "/api/users/login/",
+                {"email": "hash@example.com", "password": "securepass123"},
+            )
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(password_hashing_pool.rejected, rejected + 1)
+
+
+class UUID7TestCase(APITestCase):
+    """Test cases for time-ordered primary keys"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Print test group message"""
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR UUID7 IDS")
+        print("=" * 50)
+
+    def test_layout(self):
+        """Test version, variant and embedded timestamp"""
+        before = time.time()
+        value = uuid7()
+
+        # Assert RFC 9562 version 7 with the current time
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertAlmostEqual(uuid7_timestamp(value), before, delta=1)
+
+    def test_strictly_increasing(self):
+        """Test ids from one process sort in generation order"""
+        values = [uuid7() for _ in range(10000)]
+
+        # Assert ordering as UUIDs and as the stored strings
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+        self.assertEqual([v.hex for v in values], sorted(v.hex for v in values))
+
+    def test_counter_overflow_advances_timestamp(self):
+        """Test more ids than the counter holds in one ms stay ordered"""
+        frozen = time.time_ns()
+        with mock.patch("core.ids.time.time_ns", return_value=frozen):
+            values = [uuid7() for _ in range(5000)]
+
+        # Assert order kept by moving into the next millisecond
+        self.assertEqual(values, sorted(values))
+        self.assertGreater(uuid7_timestamp(values[-1]), frozen / 10**9)
+
+    def test_models_default_to_uuid7(self):
+        """Test new client users and teammates get version 7 ids"""
+        user = ClientUser.objects.create(
+            email="v7@example.com", first_name="Seven", last_name="Id"
+        )
+        teammate = get_user_model().objects.create_user(
+            email="v7.teammate@example.com", name="Seven", password="securepass123"
+        )
+
+        # Assert version 7 keys
+        self.assertEqual(user.id.version, 7)
+        self.assertEqual(teammate.id.version, 7)
+
+    def test_existing_uuid4_ids_still_work(self):
+        """Test rows keyed by uuid4 are found and served as before"""
+        legacy = ClientUser.objects.create(
+            id=uuid.uuid4(), email="v4@example.com", first_name="Four", last_name="Id"
+        )
+        teammate = get_user_model().objects.create_user(
+            email="reader@example.com", name="Reader", password="securepass123"
+        )
+        token = RefreshToken.for_user(teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.get(f"/api/users/{legacy.id}/")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], str(legacy.id))
+
+    def test_benchmark_command(self):
+        """Test the key benchmark runs and drops its tables"""
+        out = StringIO()
+        call_command("benchmark_uuid_keys", rows=50, batch_size=20, stdout=out)
+
+        # Assert one line per generator and no tables left behind
+        self.assertIn("uuid4", out.getvalue())
+        self.assertIn("uuid7", out.getvalue())
+        self.assertNotIn("bench_uuid7_keys", connection.introspection.table_names())
+
+
+class DatabaseStatsTestCase(APITestCase):
+    """Test cases for database connection statistics"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Print test group message"""
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR DATABASE CONNECTION STATS")
+        print("=" * 50)
+
+    def test_counts_new_connections(self):
+        """Test every connection_created signal is counted per alias"""
+        before = database_stats()["connects"]
+        connection_created.send(sender=type(connection), connection=connection)
+
+        # Assert counter and settings
+        stats = database_stats()
+        self.assertEqual(stats["connects"], before + 1)
+        self.assertEqual(stats["vendor"], "sqlite")
+        self.assertIsNone(stats["pool"])
+
+    def test_pool_stats(self):
+        """Test pool statistics are reported when the backend pools"""
+        pooled = mock.Mock(
+            vendor="postgresql",
+            settings_dict={"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": True},
+        )
+        pooled.pool.get_stats.return_value = {"pool_size": 4, "requests_waiting": 0}
+
+        with mock.patch("core.db.connections", {"default": pooled}):
+            stats = database_stats()
+
+        # Assert pool stats passed through
+        self.assertEqual(stats["pool"], {"pool_size": 4, "requests_waiting": 0})
+        self.assertEqual(stats["conn_max_age"], 0)
+
+    def test_metrics_include_database(self):
+        """Test the metrics endpoint exposes the connection statistics"""
+        response = self.client.get("/api/users/internal/metrics/")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("connects", response.data["database"])
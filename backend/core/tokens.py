@@ -0,0 +1,15 @@
+from rest_framework_simplejwt import tokens
+
+from .jwt_keys import token_backend
+
+
+# simplejwt token classes bound to the key ring backend. Use these instead of
+# the rest_framework_simplejwt.tokens ones so tokens are signed with the
+# active key and carry its kid.
+class AccessToken(tokens.AccessToken):
+    _token_backend = token_backend
+
+
+class RefreshToken(tokens.RefreshToken):
+    _token_backend = token_backend
+    access_token_class = AccessToken
@@ -23,10 +23,13 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from .views import jwks
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/teammates/", include("teammates.urls")),
     path("api/users/", include("users.urls")),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path(".well-known/jwks.json", jwks, name="jwks"),
 ]
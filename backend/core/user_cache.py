@@ -0,0 +1,20 @@
+from django.conf import settings
+
+from .lru_cache import LRUTTLCache
+
+# Resolved principals (teammates and client users) keyed by str(user_id).
+# Invalidated by the post_save/post_delete receivers in teammates.signals and
+# users.signals; the TTL bounds staleness for writes made by other workers.
+principal_cache = LRUTTLCache(
+    max_size=getattr(settings, "USER_CACHE_MAX_SIZE", 10000),
+    ttl=getattr(settings, "USER_CACHE_TTL", 60),
+)
+
+
+def invalidate_principal(user_id):
+    principal_cache.delete(str(user_id))
+
+
+def invalidate_principals(user_ids):
+    for user_id in user_ids:
+        principal_cache.delete(str(user_id))
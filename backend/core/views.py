@@ -0,0 +1,19 @@
+from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
+
+from .jwt_keys import token_backend
+
+
+@require_GET
+@cache_control(public=True, max_age=3600)
+def jwks(request):
+    """
+    Public JWT verification keys so other services can validate tokens
+    offline
+    GET /.well-known/jwks.json
+    Empty while tokens are signed with a shared HMAC secret
+    """
+    if token_backend.keyring is None:
+        return JsonResponse({"keys": []})
+    return JsonResponse(token_backend.keyring.jwks())
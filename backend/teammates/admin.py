@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from core.counting import EstimatedCountPaginator
+
 from .models import User
 
 
@@ -38,6 +40,10 @@ class UserAdmin(BaseUserAdmin):
     )
     search_fields = ("email", "name")
     ordering = ("email",)
+    # Planner estimates instead of COUNT(*) on large tables; the full count
+    # would be a second unfiltered COUNT(*) on every filtered page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     filter_horizontal = ("groups", "user_permissions")
 
 
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:07
+
+from django.db import migrations, models
+
+import core.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teammates", "0002_email_case_insensitive_unique"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="id",
+            field=models.UUIDField(
+                default=core.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
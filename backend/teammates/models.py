@@ -1,15 +1,18 @@
-import uuid
-
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+from core.emails import EmailQuerySet
+from core.hashing import password_hashing_pool
+from core.ids import uuid7
+
 
-class UserManager(BaseUserManager):
+class UserManager(BaseUserManager.from_queryset(EmailQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("Users must have an email")
@@ -19,6 +22,10 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def get_by_natural_key(self, username):
+        # Emails are unique regardless of case, see the Meta constraint
+        return self.by_email(username).get()
+
     def create_superuser(self, email, password=None, **extra_fields):
         extra_fields.setdefault("type", User.SUPERUSER)
         extra_fields.setdefault("is_superuser", True)
@@ -26,7 +33,7 @@ class UserManager(BaseUserManager):
 
 
 class User(AbstractBaseUser, PermissionsMixin):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     ADMIN = "admin"
     SUPERUSER = "superuser"
@@ -49,6 +56,27 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["name"]
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                Lower("email"), name="teammates_user_email_ci_unique"
+            ),
+        ]
+
+    def set_password(self, raw_password):
+        self.password = password_hashing_pool.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Verify on the hashing pool, upgrading outdated hashes in place"""
+
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return password_hashing_pool.check_password(raw_password, self.password, setter)
+
     @property
     def is_staff(self):
         """Admin and superuser teammates have staff access"""
@@ -1,9 +1,11 @@
 from rest_framework import serializers
 
+from core.fieldsets import SparseFieldsetMixin
+
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "email", "name", "type"]
@@ -17,6 +19,13 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ["email", "name", "type", "password"]
 
+    def validate_email(self, value):
+        if User.objects.by_email(value).exists():
+            raise serializers.ValidationError(
+                "A teammate with this email already exists."
+            )
+        return value
+
     def validate_type(self, value):
         """Prevent creating superuser teammates through registration endpoint"""
         if value == User.SUPERUSER:
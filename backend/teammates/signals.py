@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.user_cache import invalidate_principal
+
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_teammate(sender, instance, **kwargs):
+    invalidate_principal(instance.pk)
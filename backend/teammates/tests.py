@@ -60,6 +60,18 @@ class UserRegistrationTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("email", response.data)
 
+    def test_register_user_duplicate_email_other_case(self):
+        """Test registration fails when the email differs only by case"""
+        User.objects.create_user(**self.valid_user_data)
+
+        duplicate = self.valid_user_data.copy()
+        duplicate["email"] = duplicate["email"].upper()
+        response = self.client.post(self.register_url, duplicate)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("email", response.data)
+
     def test_register_user_missing_email(self):
         """Test registration fails when email is missing"""
         invalid_data = self.valid_user_data.copy()
@@ -282,6 +294,17 @@ class UserProfileTestCase(APITestCase):
         self.assertEqual(response.data["email"], self.user.email)
         self.assertNotEqual(response.data["email"], other_user.email)
 
+    def test_get_profile_sparse_fields(self):
+        """Test ?fields= and ?exclude= narrow the profile response"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+        response = self.client.get(self.profile_url, {"fields": "email"})
+        excluded = self.client.get(self.profile_url, {"exclude": "type"})
+
+        # Assert responses
+        self.assertEqual(response.data, {"email": self.user.email})
+        self.assertEqual(set(excluded.data), {"id", "email", "name"})
+
 
 class UserModelTestCase(TestCase):
     """Test cases for User model"""
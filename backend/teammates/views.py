@@ -8,6 +8,8 @@ class RegisterView(generics.CreateAPIView):
 
 
 class ProfileView(generics.RetrieveAPIView):
+    # Supports ?fields= / ?exclude=; the teammate is already loaded by
+    # authentication so only the output is narrowed
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -0,0 +1,186 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from core.emails import normalize_email
+from core.hashing import password_hashing_pool
+
+from .lookup_cache import email_lookup_cache
+from .models import User
+from .serializers import EMAIL_TAKEN, UserImportSerializer
+
+# Same formats (and content types) as the export, so an export re-imports
+IMPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+DUPLICATE_IN_IMPORT = "This email appears earlier in the import."
+
+
+def ndjson_rows(lines):
+    """One dict per non-blank line; unparsable lines become their error"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield {"non_field_errors": ["Invalid JSON."]}, True
+            continue
+        if not isinstance(row, dict):
+            yield {"non_field_errors": ["Expected a JSON object."]}, True
+            continue
+        yield row, False
+
+
+def csv_rows(lines):
+    # Empty cells mean "not given", so optional columns get their defaults
+    for row in csv.DictReader(lines):
+        yield {key: value for key, value in row.items() if key and value}, False
+
+
+def read_rows(lines, input_format):
+    """(row or errors, is_error) pairs from text lines in `input_format`"""
+    if input_format == "csv":
+        return csv_rows(lines)
+    return ndjson_rows(lines)
+
+
+class ImportReport:
+    """Outcome of an import; `errors` holds one entry per rejected row"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row_number, email, errors):
+        self.errors.append({"row": row_number, "email": email, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+        }
+
+
+class UserImporter:
+    """
+    Creates users from an iterable of rows, `chunk_size` rows at a time
+
+    Per chunk: every row is validated, emails are checked against the table
+    with one query (and against the rows already seen in this import), the
+    passwords given are hashed in parallel on the hashing pool, and the
+    valid rows go in with one bulk INSERT in a transaction. Rows are
+    numbered from 1 in the report; a rejected row never stops the import.
+    """
+
+    def __init__(self, chunk_size=None, hashing_pool=None):
+        self.chunk_size = chunk_size or getattr(
+            settings, "USER_IMPORT_CHUNK_SIZE", 1000
+        )
+        self.hashing_pool = hashing_pool or password_hashing_pool
+        # One instance validates every row, as ListSerializer does: building
+        # the fields per row costs more than validating it
+        self.serializer = UserImportSerializer()
+        self.report = ImportReport()
+        self.seen_emails = set()
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        while chunk := list(islice(numbered, self.chunk_size)):
+            self.import_chunk(chunk)
+        return self.report
+
+    def import_chunk(self, chunk):
+        valid = []
+        for row_number, (row, is_error) in chunk:
+            if is_error:
+                self.report.add_error(row_number, None, row)
+                continue
+            try:
+                valid.append((row_number, self.serializer.run_validation(row)))
+            except ValidationError as exc:
+                self.report.add_error(
+                    row_number, row.get("email"), as_serializer_error(exc)
+                )
+
+        valid = self.drop_duplicates(valid)
+        if not valid:
+            return
+
+        passwords = [data.get("password") for _, data in valid]
+        hashed = self.hash_passwords(passwords)
+        now = timezone.now()
+        users = []
+        for (_, data), password in zip(valid, hashed):
+            data = {key: value for key, value in data.items() if key != "password"}
+            users.append(User(**data, password=password, date_joined=now))
+
+        with transaction.atomic():
+            # A concurrent insert of the same email is skipped, not an error
+            # for the whole chunk; the rows really inserted are read back
+            User.objects.bulk_create(users, ignore_conflicts=True)
+            inserted = set(
+                User.objects.filter(pk__in=[user.pk for user in users]).values_list(
+                    "pk", flat=True
+                )
+            )
+
+        for (row_number, data), user in zip(valid, users):
+            if user.pk in inserted:
+                self.report.created += 1
+                # May be cached as "not found"; bulk_create sends no signals
+                email_lookup_cache.delete(normalize_email(user.email))
+            else:
+                self.report.add_error(
+                    row_number, data["email"], {"email": [EMAIL_TAKEN]}
+                )
+
+    def drop_duplicates(self, valid):
+        """Rows whose email is neither in the table nor earlier in the import"""
+        emails = [data["email"] for _, data in valid]
+        existing = {
+            normalize_email(email)
+            for email in User.objects.by_emails(emails).values_list("email", flat=True)
+        }
+
+        kept = []
+        for row_number, data in valid:
+            email = normalize_email(data["email"])
+            if email in existing:
+                self.report.add_error(
+                    row_number, data["email"], {"email": [EMAIL_TAKEN]}
+                )
+            elif email in self.seen_emails:
+                self.report.add_error(
+                    row_number, data["email"], {"email": [DUPLICATE_IN_IMPORT]}
+                )
+            else:
+                self.seen_emails.add(email)
+                kept.append((row_number, data))
+        return kept
+
+    def hash_passwords(self, passwords):
+        """Hashes for the given passwords, None where no password was given"""
+        given = [index for index, password in enumerate(passwords) if password]
+        hashed = [None] * len(passwords)
+        if given:
+            results = self.hashing_pool.hash_many(passwords[i] for i in given)
+            for index, encoded in zip(given, results):
+                hashed[index] = encoded
+        return hashed
+
+
+def import_users(lines, input_format, chunk_size=None, hashing_pool=None):
+    """Import users from text lines in `input_format`; returns the report"""
+    importer = UserImporter(chunk_size=chunk_size, hashing_pool=hashing_pool)
+    return importer.run(read_rows(lines, input_format))
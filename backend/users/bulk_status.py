@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db import transaction
+
+from core.revocation import revoke_users_tokens
+from core.user_cache import invalidate_principals
+
+from .lookup_cache import invalidate_email_lookups
+from .models import User
+
+# Statuses that end the user's sessions, as DELETE /api/users/{id}/ does
+REVOKING_STATUSES = {User.INACTIVE, User.SUSPENDED}
+
+
+def set_users_status(queryset, new_status, chunk_size=None):
+    """
+    Move every user in `queryset` to `new_status`, in chunks of users
+
+    Each chunk is one transaction: the next matching rows by primary key
+    are read (ids and emails only) and locked in pk order, so concurrent
+    calls cannot deadlock; then the UPDATE and the token revocation use
+    exactly the locked ids that need the change, and the caches are
+    invalidated once it commits. Memory, lock set and watermark upsert stay
+    bounded by the chunk size however many users match. update() sends no
+    post_save signals, hence the explicit invalidation.
+    Returns {"matched", "updated"}.
+    """
+    chunk_size = chunk_size or getattr(settings, "USER_BULK_STATUS_CHUNK_SIZE", 1000)
+    queryset = queryset.order_by("pk")
+    result = {"matched": 0, "updated": 0}
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        with transaction.atomic():
+            locked = chunk.select_for_update().values_list("id", "email", "status")
+            rows = list(locked[:chunk_size])
+            changed = [
+                (pk, email) for pk, email, status in rows if status != new_status
+            ]
+            changed_ids = [pk for pk, _ in changed]
+            if changed:
+                User.objects.filter(pk__in=changed_ids).update(status=new_status)
+                if new_status in REVOKING_STATUSES:
+                    revoke_users_tokens(changed_ids)
+
+        if changed:
+            invalidate_principals(changed_ids)
+            invalidate_email_lookups(changed)
+        result["matched"] += len(rows)
+        result["updated"] += len(changed)
+        if len(rows) < chunk_size:
+            return result
+        last_pk = rows[-1][0]
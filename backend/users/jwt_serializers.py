@@ -1,4 +1,16 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+
+from core.principals import (
+    PRINCIPAL_KIND_CLAIM,
+    get_display_name,
+    get_principal_kind,
+)
+from core.revocation import revocation_filter
+from core.tokens import RefreshToken
 
 from .models import User
 
@@ -11,12 +23,46 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     custom claims in the JWT token:
         - type: The user's type (e.g., role or user category).
         - status: The user's status (e.g., active, inactive, suspended).
+        - kind: Which table the user_id belongs to ("teammate" or "client"),
+          so authentication can go straight to the right model.
+        - email, name: Enough identity for ClaimsJWTAuthentication to answer
+          token introspection without loading the user.
+
+    It is also configured as SIMPLE_JWT["TOKEN_OBTAIN_SERIALIZER"], so tokens
+    issued by /api/token/ carry the same claims.
     """
 
+    token_class = RefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
         # Add custom claims
         token["type"] = getattr(user, "type", None)
-        token["status"] = getattr(user, "status", User.INACTIVE)
+        token["status"] = cls.get_status(user)
+        token[PRINCIPAL_KIND_CLAIM] = get_principal_kind(user)
+        token["email"] = user.email
+        token["name"] = get_display_name(user)
         return token
+
+    @staticmethod
+    def get_status(user):
+        # Teammates have no status field, only the is_active flag
+        if hasattr(user, "status"):
+            return user.status
+        return User.ACTIVE if user.is_active else User.INACTIVE
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that refuses revoked refresh tokens
+    Configured as SIMPLE_JWT["TOKEN_REFRESH_SERIALIZER"]
+    """
+
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs["refresh"])
+        if revocation_filter.is_revoked(refresh.payload):
+            raise InvalidToken("Token has been revoked")
+        return super().validate(attrs)
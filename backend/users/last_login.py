@@ -0,0 +1,143 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, models
+from django.db.models import Case, Value, When
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """
+    Write-behind buffer for User.last_login
+
+    Logins record a timestamp here instead of writing the row. Timestamps are
+    coalesced per user (latest wins) and written with a single UPDATE ...
+    CASE statement by a daemon thread, once `flush_size` users are pending or
+    `flush_interval` seconds have passed since the last flush. The login that
+    fills or finds the buffer due wakes the thread, so no login request waits
+    on a flush. An atexit hook flushes whatever is left when the worker
+    shuts down, so at most one interval of logins is lost on a crash.
+    Without the thread (`background=False`) logins flush inline when due.
+    """
+
+    def __init__(self, flush_size=100, flush_interval=5, background=True):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.background = background
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._next_flush = time.monotonic() + flush_interval
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self.recorded = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failures = 0
+
+    def record(self, user_id, timestamp):
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or timestamp > current:
+                self._pending[user_id] = timestamp
+            self.recorded += 1
+            due = self._is_due()
+        if not self.background:
+            if due:
+                self.flush()
+            return
+        self._ensure_thread()
+        if due:
+            self._wake.set()
+
+    def _is_due(self):
+        return (
+            len(self._pending) >= self.flush_size
+            or time.monotonic() >= self._next_flush
+        )
+
+    def flush(self):
+        """Write every pending timestamp; returns the number of users updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._next_flush = time.monotonic() + self.flush_interval
+        if not pending:
+            return 0
+
+        try:
+            User.objects.filter(pk__in=pending).update(
+                last_login=Case(
+                    *(When(pk=pk, then=Value(ts)) for pk, ts in pending.items()),
+                    output_field=models.DateTimeField(),
+                )
+            )
+        except DatabaseError:
+            logger.exception("Flushing %d last_login updates failed", len(pending))
+            self._requeue(pending)
+            return 0
+
+        with self._lock:
+            self.flushes += 1
+            self.flushed_rows += len(pending)
+        return len(pending)
+
+    def _requeue(self, pending):
+        # Keep newer timestamps recorded while the failed flush was running
+        with self._lock:
+            self.failures += 1
+            for pk, ts in pending.items():
+                current = self._pending.get(pk)
+                if current is None or ts > current:
+                    self._pending[pk] = ts
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="last-login-flush", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(max(self.flush_interval, 1))
+            self._wake.clear()
+            with self._lock:
+                due = self._is_due()
+            if due and not self._stop.is_set():
+                self.flush()
+                close_old_connections()
+
+    def close(self):
+        """Stop the flush thread and write what is left (atexit hook)"""
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flush_size": self.flush_size,
+                "flush_interval": self.flush_interval,
+                "recorded": self.recorded,
+                "flushes": self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "failures": self.failures,
+            }
+
+
+last_login_buffer = LastLoginBuffer(
+    flush_size=getattr(settings, "LAST_LOGIN_FLUSH_SIZE", 100),
+    flush_interval=getattr(settings, "LAST_LOGIN_FLUSH_INTERVAL", 5),
+    background=getattr(settings, "LAST_LOGIN_FLUSH_THREAD", True),
+)
+atexit.register(last_login_buffer.close)
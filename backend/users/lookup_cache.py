@@ -0,0 +1,47 @@
+from django.conf import settings
+
+from core.emails import normalize_email
+from core.lru_cache import LRUTTLCache
+
+# Rendered responses of the internal by-email lookup keyed by the normalized
+# email. Values are (status_code, body, user_id); "not found" responses are
+# kept too, for USER_LOOKUP_NEGATIVE_TTL seconds, with user_id None.
+email_lookup_cache = LRUTTLCache(
+    max_size=getattr(settings, "USER_LOOKUP_CACHE_MAX_SIZE", 4096),
+    ttl=getattr(settings, "USER_LOOKUP_CACHE_TTL", 60),
+)
+
+
+# Key each user's found lookup is cached under, so a save drops that one
+# entry (the email may have changed since) without scanning the cache. Same
+# size and TTL as the cache; if an index entry is evicted first, the lookup
+# it pointed to still expires within USER_LOOKUP_CACHE_TTL, as it does on
+# the other workers.
+_lookup_keys = LRUTTLCache(
+    max_size=email_lookup_cache.max_size, ttl=email_lookup_cache.ttl
+)
+
+
+def cache_email_lookup(key, value, ttl=None):
+    """Cache a rendered lookup, indexing found users by their id"""
+    email_lookup_cache.set(key, value, ttl=ttl)
+    if value[2] is not None:
+        _lookup_keys.set(value[2], key, ttl=ttl)
+
+
+def invalidate_email_lookup(user):
+    """
+    Drop the cached lookups for the user's current email (it may have been
+    cached as not found) and any entry still holding the user's old email
+    """
+    invalidate_email_lookups([(user.pk, user.email)])
+
+
+def invalidate_email_lookups(users):
+    """invalidate_email_lookup() for many (pk, email) pairs"""
+    for pk, email in users:
+        email_lookup_cache.delete(normalize_email(email))
+        key = _lookup_keys.get(pk)
+        if key is not None:
+            email_lookup_cache.delete(key)
+            _lookup_keys.delete(pk)
@@ -0,0 +1,125 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand, CommandError
+
+from core.hashers import (
+    TunedArgon2PasswordHasher,
+    TunedPBKDF2PasswordHasher,
+    TunedScryptPasswordHasher,
+)
+
+# Candidate work factors per hasher. Each entry maps hasher
+# attributes to values; everything not listed keeps its configured value.
+CANDIDATES = {
+    "argon2": (
+        TunedArgon2PasswordHasher,
+        [
+            {"time_cost": t, "memory_cost": m}
+            for m in (19456, 47104, 65536, 102400)
+            for t in (1, 2, 3, 4)
+        ],
+    ),
+    "scrypt": (
+        TunedScryptPasswordHasher,
+        [{"work_factor": 2**n} for n in range(14, 19)],
+    ),
+    "pbkdf2": (
+        TunedPBKDF2PasswordHasher,
+        [{"iterations": n} for n in (300000, 600000, 870000, 1000000, 1500000)],
+    ),
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def build_hasher(hasher_class, params):
+    """A hasher instance with the given work factors overriding settings"""
+    overrides = {
+        name: property(lambda self, v=value: v) for name, value in params.items()
+    }
+    return type(hasher_class.__name__, (hasher_class,), overrides)()
+
+
+def time_verify(hasher, samples, password="benchmark-password"):
+    """Milliseconds taken by `samples` successful verifications"""
+    encoded = hasher.encode(password, hasher.salt())
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.verify(password, encoded)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+# Login latency is dominated by one hash verification. Run this on the
+# production hardware (ideally under the usual background load) and put the
+# recommended values in the environment.
+class Command(BaseCommand):
+    help = "Measure password hasher cost on this host against a target latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hasher",
+            choices=sorted(CANDIDATES),
+            default=getattr(settings, "PASSWORD_HASHER", "argon2"),
+        )
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250.0,
+            help="Target p99 verification time in milliseconds",
+        )
+        parser.add_argument(
+            "--samples", type=int, default=20, help="Verifications per candidate"
+        )
+
+    def handle(self, *args, **options):
+        hasher_class, candidates = CANDIDATES[options["hasher"]]
+        target = options["target_ms"]
+        if options["samples"] < 1:
+            raise CommandError("--samples must be at least 1")
+
+        if hasher_class.library:
+            try:
+                hasher_class()._load_library()
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"Benchmarking {options['hasher']} ({options['samples']} samples, "
+            f"target p99 {target:.0f} ms)"
+        )
+        best, best_p50 = None, 0.0
+        for params in candidates:
+            timings = time_verify(
+                build_hasher(hasher_class, params), options["samples"]
+            )
+            p50 = statistics.median(timings)
+            p99 = percentile(timings, 99)
+            within = p99 <= target
+            if within and p50 >= best_p50:
+                best, best_p50 = params, p50
+            label = ", ".join(f"{k}={v}" for k, v in params.items())
+            self.stdout.write(
+                f"  {label:<40} p50 {p50:8.1f} ms  p99 {p99:8.1f} ms"
+                f"{'' if within else '  (over target)'}"
+            )
+
+        if best is None:
+            self.stdout.write(
+                self.style.WARNING("No candidate meets the target on this host")
+            )
+            return
+
+        prefix = options["hasher"].upper()
+        settings_lines = " ".join(f"{prefix}_{k.upper()}={v}" for k, v in best.items())
+        self.stdout.write(self.style.SUCCESS(f"Recommended: {settings_lines}"))
+        if hashers.get_hasher("default").algorithm != hasher_class.algorithm:
+            self.stdout.write(f"Also set PASSWORD_HASHER={options['hasher']}")
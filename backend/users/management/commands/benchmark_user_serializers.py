@@ -0,0 +1,91 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from core.compiled_serializers import compile_serializer
+from users.models import User
+from users.serializers import UserSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+def time_best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# Compares rendering N users with UserSerializer (model instances) against the
+# compiled values() path, end to end from the query to the JSON bytes. The
+# rows are inserted in a transaction that is rolled back afterwards.
+class Command(BaseCommand):
+    help = "Benchmark the compiled user serializer against UserSerializer"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1000, 10000], help="Row counts"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Runs per size; best is reported"
+        )
+
+    def handle(self, *args, **options):
+        if min(options["sizes"]) < 1 or options["repeat"] < 1:
+            raise CommandError("--sizes and --repeat must be positive")
+
+        try:
+            with transaction.atomic():
+                self.run(options["sizes"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, repeat):
+        now = timezone.now()
+        marker = uuid.uuid4().hex[:8]
+        User.objects.bulk_create(
+            User(
+                email=f"bench-{marker}-{i}@example.com",
+                first_name="Bench",
+                last_name=str(i),
+                date_joined=now - timedelta(seconds=i),
+            )
+            for i in range(max(sizes))
+        )
+        base = User.objects.filter(email__startswith=f"bench-{marker}-").order_by(
+            "-date_joined", "-id"
+        )
+        compiled = compile_serializer(UserSerializer)
+        renderer = JSONRenderer()
+
+        for size in sizes:
+            queryset = base[:size]
+
+            def drf():
+                return renderer.render(UserSerializer(queryset, many=True).data)
+
+            def fast():
+                return renderer.render(compiled.serialize(compiled.values(queryset)))
+
+            if drf() != fast():
+                raise CommandError(f"Output differs at {size} rows")
+
+            drf_time = time_best(drf, repeat)
+            fast_time = time_best(fast, repeat)
+            self.stdout.write(
+                f"{size:>7} rows  serializer {size / drf_time:>10.0f} rows/s  "
+                f"compiled {size / fast_time:>10.0f} rows/s  "
+                f"speedup {drf_time / fast_time:.1f}x"
+            )
@@ -0,0 +1,95 @@
+import os
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, models, transaction
+
+from core.ids import uuid7
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+# Inserts the same number of rows into two scratch tables keyed by uuid4 and
+# uuid7 ids and reports insert throughput and primary key index size. Random
+# keys touch a random leaf page per insert, so the gap grows once the index
+# no longer fits in shared_buffers: run with a few million rows on PostgreSQL
+# for representative numbers. The tables are dropped afterwards.
+class Command(BaseCommand):
+    help = "Benchmark uuid4 against uuid7 primary keys on insert"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000000)
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        rows, batch_size = options["rows"], options["batch_size"]
+        if rows < 1 or batch_size < 1:
+            raise CommandError("--rows and --batch-size must be positive")
+
+        for name, generate in GENERATORS.items():
+            table = f"bench_{name}_keys"
+            self.create_table(table)
+            try:
+                elapsed, tail_rate = self.fill(table, generate, rows, batch_size)
+                size = self.index_size(table)
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE {connection.ops.quote_name(table)}")
+
+            size = f"{size / 1024 / 1024:.1f} MiB" if size is not None else "n/a"
+            self.stdout.write(
+                f"{name}  {rows / elapsed:>9.0f} rows/s overall  "
+                f"{tail_rate:>9.0f} rows/s last batch  pk index {size}"
+            )
+
+    def create_table(self, table):
+        column_type = connection.data_types["UUIDField"]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {connection.ops.quote_name(table)} "
+                f"(id {column_type} PRIMARY KEY, payload varchar(32) NOT NULL)"
+            )
+
+    def fill(self, table, generate, rows, batch_size):
+        """Insert `rows` rows in batches; total time and last batch rate"""
+        field = models.UUIDField()
+        sql = f"INSERT INTO {connection.ops.quote_name(table)} VALUES (%s, %s)"
+        payload = os.urandom(16).hex()
+        elapsed = tail_rate = 0.0
+        for start in range(0, rows, batch_size):
+            count = min(batch_size, rows - start)
+            params = [
+                (field.get_db_prep_value(generate(), connection), payload)
+                for _ in range(count)
+            ]
+            began = time.perf_counter()
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+            batch_time = time.perf_counter() - began
+            elapsed += batch_time
+            tail_rate = count / batch_time
+        return elapsed, tail_rate
+
+    def index_size(self, table):
+        """Bytes used by the primary key index, None if not measurable"""
+        with connection.cursor() as cursor:
+            try:
+                if connection.vendor == "postgresql":
+                    cursor.execute(
+                        "SELECT pg_relation_size(indexrelid) FROM pg_index "
+                        "WHERE indrelid = %s::regclass AND indisprimary",
+                        [table],
+                    )
+                elif connection.vendor == "sqlite":
+                    cursor.execute(
+                        "SELECT SUM(pgsize) FROM dbstat WHERE name = %s",
+                        [f"sqlite_autoindex_{table}_1"],
+                    )
+                else:
+                    return None
+            except DatabaseError:
+                # SQLite builds without the dbstat table
+                return None
+            row = cursor.fetchone()
+        return row[0] if row else None
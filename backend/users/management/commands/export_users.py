@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.exceptions import ValidationError
+
+from users.export import EXPORT_FORMATS, export_lines
+from users.filters import filter_users
+from users.models import User
+
+
+# Same output and filters as GET /api/users/export/, without going through
+# HTTP. Rows are streamed so the table size does not matter.
+class Command(BaseCommand):
+    help = "Stream users as NDJSON or CSV to stdout or a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", choices=EXPORT_FORMATS, default="ndjson")
+        parser.add_argument("--file", help="Write here instead of stdout")
+        parser.add_argument("--status")
+        parser.add_argument("--type")
+        parser.add_argument("--date-joined-after")
+        parser.add_argument("--date-joined-before")
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        params = {
+            name: options[name]
+            for name in ("status", "type", "date_joined_after", "date_joined_before")
+            if options[name] is not None
+        }
+        try:
+            queryset = filter_users(User.objects.all(), params)
+        except ValidationError as exc:
+            errors = "; ".join(
+                f"{field}: {' '.join(messages)}"
+                for field, messages in exc.detail.items()
+            )
+            raise CommandError(f"Invalid filters - {errors}")
+
+        lines = export_lines(queryset, options["output"], options["chunk_size"])
+        if options["file"]:
+            with open(options["file"], "w", newline="") as out:
+                count = self.write_lines(out, lines, options["output"])
+            self.stderr.write(f"Exported {count} users to {options['file']}")
+        else:
+            self.write_lines(self.stdout, lines, options["output"])
+
+    def write_lines(self, out, lines, output):
+        count = 0
+        for line in lines:
+            out.write(line)
+            count += 1
+        # The CSV header is not a user
+        return count - 1 if output == "csv" else count
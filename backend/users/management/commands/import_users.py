@@ -0,0 +1,70 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.hashing import PasswordHashingPool
+from users.bulk_import import IMPORT_FORMATS, import_users
+
+
+# Same pipeline as POST /api/users/internal/import/, reading a file or stdin.
+# --workers hashes on a dedicated pool sized for the import instead of the
+# web workers' PASSWORD_HASHING_WORKERS.
+class Command(BaseCommand):
+    help = "Create users in bulk from an NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path to read, or - for stdin")
+        parser.add_argument("--input", choices=IMPORT_FORMATS, default="ndjson")
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument(
+            "--workers", type=int, help="Processes hashing passwords for the import"
+        )
+        parser.add_argument("--report", help="Write the JSON error report here")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] is not None and options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        pool = None
+        if options["workers"] is not None:
+            # Each password in flight holds a pending slot: one per worker
+            workers = options["workers"]
+            pool = PasswordHashingPool(max_workers=workers, max_pending=max(1, workers))
+
+        start = time.perf_counter()
+        try:
+            if options["file"] == "-":
+                report = self.run(sys.stdin, options, pool)
+            else:
+                try:
+                    source = open(options["file"], newline="", encoding="utf-8-sig")
+                except OSError as exc:
+                    raise CommandError(f"Cannot read {options['file']}: {exc}")
+                with source:
+                    report = self.run(source, options, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        elapsed = time.perf_counter() - start
+
+        result = report.as_dict()
+        if options["report"]:
+            with open(options["report"], "w") as out:
+                json.dump(result, out, indent=2)
+        else:
+            for error in result["errors"]:
+                self.stderr.write(
+                    f"row {error['row']} ({error['email']}): "
+                    f"{json.dumps(error['errors'])}"
+                )
+        self.stdout.write(
+            f"Created {result['created']} users, rejected {result['failed']} rows "
+            f"in {elapsed:.1f}s"
+        )
+
+    def run(self, lines, options, pool):
+        return import_users(
+            lines, options["input"], options["chunk_size"], hashing_pool=pool
+        )
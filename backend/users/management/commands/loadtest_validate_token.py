@@ -0,0 +1,125 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    close_old_connections,
+    connection,
+    connections,
+)
+from django.test import Client
+
+from core.db import connects
+from core.user_cache import principal_cache
+from users.jwt_serializers import CustomTokenObtainPairSerializer
+from users.models import User
+
+URL = "/api/users/validate-token/"
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+# Drives GET /api/users/validate-token/ through the full Django stack in
+# this process (middleware, authentication) from --concurrency threads.
+# The test client detaches close_old_connections() from the request
+# signals, so it is called around each request here, as the WSGI handler
+# does under gunicorn. The principal cache is cleared before each request
+# unless --warm-cache is given, so every request reads the user from the
+# database the way cache misses do. With --compare the run is repeated with
+# CONN_MAX_AGE=0 (a new connection per request) as the baseline.
+class Command(BaseCommand):
+    help = "Load test validate-token and report latency and connections opened"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--warm-cache", action="store_true")
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Also run with a new connection per request, as the baseline",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["requests"], options["concurrency"], options["users"]) < 1:
+            raise CommandError("--requests, --concurrency and --users must be positive")
+
+        marker = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create(
+            User(
+                email=f"loadtest-{marker}-{i}@example.com",
+                first_name="Load",
+                last_name=str(i),
+            )
+            for i in range(options["users"])
+        )
+        tokens = [
+            str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+            for user in users
+        ]
+        try:
+            db_settings = connections.settings[DEFAULT_DB_ALIAS]
+            configured = db_settings["CONN_MAX_AGE"]
+            if options["compare"]:
+                if db_settings["OPTIONS"].get("pool"):
+                    self.stderr.write("Pooled: no per-request baseline, skipping it")
+                else:
+                    db_settings["CONN_MAX_AGE"] = 0
+                    try:
+                        self.run("new connection per request", tokens, options)
+                    finally:
+                        db_settings["CONN_MAX_AGE"] = configured
+            self.run(f"configured (CONN_MAX_AGE={configured})", tokens, options)
+        finally:
+            User.objects.filter(email__startswith=f"loadtest-{marker}-").delete()
+
+    def run(self, label, tokens, options):
+        host = next(
+            (h.lstrip(".") for h in settings.ALLOWED_HOSTS if "*" not in h), "localhost"
+        )
+        connects_before = connects[DEFAULT_DB_ALIAS]
+        warm = options["warm_cache"]
+
+        def worker(offset):
+            client = Client(HTTP_HOST=host)
+            latencies = []
+            try:
+                for i in range(offset, options["requests"], options["concurrency"]):
+                    if not warm:
+                        principal_cache.clear()
+                    token = tokens[i % len(tokens)]
+                    start = time.perf_counter()
+                    close_old_connections()
+                    response = client.get(URL, HTTP_AUTHORIZATION=f"Bearer {token}")
+                    close_old_connections()
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        raise CommandError(
+                            f"validate-token returned {response.status_code}"
+                        )
+            finally:
+                # Persistent connections belong to the thread; end with it
+                connection.close()
+            return latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(executor.map(worker, range(options["concurrency"])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(value * 1000 for result in results for value in result)
+        self.stdout.write(
+            f"{label}: {len(latencies) / elapsed:.0f} req/s  "
+            f"p50 {statistics.median(latencies):.2f} ms  "
+            f"p95 {percentile(latencies, 0.95):.2f} ms  "
+            f"p99 {percentile(latencies, 0.99):.2f} ms  "
+            f"connections opened {connects[DEFAULT_DB_ALIAS] - connects_before}"
+        )
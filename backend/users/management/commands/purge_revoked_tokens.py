@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import RevokedToken, TokenRevocationWatermark
+
+
+# Revocation rows are only useful until the tokens they cover expire.
+# Run this periodically (e.g. daily cron) to keep the tables small.
+class Command(BaseCommand):
+    help = "Delete revoked tokens and watermarks that no live token can match"
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+
+        tokens, _ = RevokedToken.objects.filter(expires_at__lte=now).delete()
+        watermarks, _ = TokenRevocationWatermark.objects.filter(
+            not_before__lte=now - api_settings.REFRESH_TOKEN_LIFETIME
+        ).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {tokens} revoked tokens and {watermarks} watermarks"
+            )
+        )
@@ -1,8 +1,28 @@
+import hashlib
+import time
+
 from django.conf import settings
 from django.http import JsonResponse
 
 import jwt
 
+from core.lru_cache import LRUTTLCache
+
+# Verification results keyed by a digest of the service token. Valid tokens
+# are remembered until their exp claim, failures only briefly and in a
+# separate, smaller cache, so a flood of garbage tokens can only evict other
+# failures, never the valid tokens.
+internal_token_cache = LRUTTLCache(
+    max_size=getattr(settings, "INTERNAL_JWT_CACHE_MAX_SIZE", 1024),
+    ttl=getattr(settings, "INTERNAL_JWT_CACHE_MAX_TTL", 300),
+)
+internal_token_failure_cache = LRUTTLCache(
+    max_size=getattr(settings, "INTERNAL_JWT_FAILURE_CACHE_MAX_SIZE", 256),
+    ttl=getattr(settings, "INTERNAL_JWT_CACHE_FAILURE_TTL", 5),
+)
+
+VALID = "valid"
+
 
 class InternalJWTAuthMiddleware:
     def __init__(self, get_response):
@@ -14,17 +34,49 @@ class InternalJWTAuthMiddleware:
             if not auth_header.startswith("Bearer "):
                 return JsonResponse({"error": "Unauthorized request"}, status=401)
             token = auth_header.split(" ")[1]
-            try:
-                payload = jwt.decode(
-                    token, settings.INTERNAL_JWT_SECRET_KEY, algorithms=["HS256"]
-                )
-                allowed_services = getattr(
-                    settings, "INTERNAL_JWT_ALLOWED_SERVICES", ["sugarfoot", "gary"]
-                )
-                if payload.get("service") not in allowed_services:
-                    return JsonResponse({"error": "Service unauthorized"}, status=401)
-            except jwt.ExpiredSignatureError:
-                return JsonResponse({"error": "Token expired"}, status=401)
-            except jwt.InvalidTokenError:
-                return JsonResponse({"error": "Invalid token"}, status=401)
+            result = self.check_token(token)
+            if result != VALID:
+                return JsonResponse({"error": result}, status=401)
         return self.get_response(request)
+
+    def check_token(self, token):
+        """
+        Return VALID or the error message for a service token, reusing the
+        cached outcome of an earlier verification of the same token
+        """
+        key = hashlib.sha256(token.encode()).hexdigest()
+        result = internal_token_cache.get(key)
+        if result is None:
+            result = internal_token_failure_cache.get(key)
+        if result is not None:
+            return result
+
+        result, ttl = self.verify_token(token)
+        if result != VALID:
+            if internal_token_failure_cache.ttl > 0:
+                internal_token_failure_cache.set(key, result)
+        elif ttl > 0:
+            internal_token_cache.set(key, result, ttl=ttl)
+        return result
+
+    def verify_token(self, token):
+        """Return the verification result and how long a valid one may be cached"""
+        try:
+            payload = jwt.decode(
+                token, settings.INTERNAL_JWT_SECRET_KEY, algorithms=["HS256"]
+            )
+        except jwt.ExpiredSignatureError:
+            return "Token expired", 0
+        except jwt.InvalidTokenError:
+            return "Invalid token", 0
+
+        allowed_services = getattr(
+            settings, "INTERNAL_JWT_ALLOWED_SERVICES", ["sugarfoot", "gary"]
+        )
+        if payload.get("service") not in allowed_services:
+            return "Service unauthorized", 0
+
+        ttl = internal_token_cache.ttl
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+        return VALID, ttl
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("jti", models.CharField(max_length=255, unique=True)),
+                ("user_id", models.UUIDField(blank=True, null=True)),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "revoked_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "users_revoked_token",
+            },
+        ),
+        migrations.CreateModel(
+            name="TokenRevocationWatermark",
+            fields=[
+                ("user_id", models.UUIDField(primary_key=True, serialize=False)),
+                ("not_before", models.DateTimeField()),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "users_token_revocation_watermark",
+            },
+        ),
+    ]
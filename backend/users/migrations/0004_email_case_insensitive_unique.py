@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:39
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+INDEX_NAME = "users_user_email_ci_unique"
+CREATE_INDEX = (
+    f"CREATE UNIQUE INDEX CONCURRENTLY {INDEX_NAME} ON users_user ((LOWER(email)))"
+)
+DROP_INDEX = f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}"
+
+
+def check_email_collisions(apps, schema_editor):
+    """
+    Refuse to add the case-insensitive unique constraint while emails that
+    only differ by case exist; they have to be merged or renamed by hand.
+    """
+    User = apps.get_model("users", "User")
+    collisions = (
+        User.objects.annotate(email_lower=Lower("email"))
+        .values("email_lower")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .values_list("email_lower", flat=True)
+    )
+    if collisions:
+        raise RuntimeError(
+            "Emails differing only by case must be resolved before migrating: "
+            + ", ".join(sorted(collisions))
+        )
+
+
+class Migration(migrations.Migration):
+    # The unique index is built CONCURRENTLY so the table stays writable
+    # while it builds, which cannot run inside a transaction. Django creates
+    # the functional UniqueConstraint as this same unique index, so the
+    # model state keeps the constraint.
+    atomic = False
+
+    dependencies = [
+        ("users", "0003_token_revocation"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_email_collisions, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                # A failed concurrent build leaves an invalid index behind;
+                # drop it so the migration can simply be run again
+                migrations.RunSQL([DROP_INDEX, CREATE_INDEX], reverse_sql=DROP_INDEX),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="user",
+                    constraint=models.UniqueConstraint(
+                        django.db.models.functions.text.Lower("email"),
+                        name=INDEX_NAME,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY keeps the users table writable while the
+    # index builds, and cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("users", "0004_email_case_insensitive_unique"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                fields=["date_joined", "id"], name="users_user_joined_id_idx"
+            ),
+        ),
+    ]
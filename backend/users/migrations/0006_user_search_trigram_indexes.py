@@ -0,0 +1,44 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Trigram GIN indexes for the user search endpoint (users/search.py) and the
+# admin search. They index UPPER(column) because that is what Django's
+# icontains/istartswith compare on PostgreSQL. Built CONCURRENTLY so a large
+# users table stays writable; PostgreSQL only, other backends skip them.
+SEARCH_COLUMNS = ("first_name", "last_name", "email")
+
+
+def index_name(column):
+    return f"users_user_{column}_trgm"
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(column)} "
+            f"ON users_user USING gin (UPPER({column}::text) gin_trgm_ops)"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f"DROP INDEX CONCURRENTLY IF EXISTS {index_name(column)}"
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0005_user_list_keyset_index"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
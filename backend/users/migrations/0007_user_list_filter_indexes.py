@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:56
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY keeps the users table writable while the
+    # index builds, and cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("users", "0006_user_search_trigram_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("status", "active")),
+                fields=["date_joined", "id"],
+                name="users_user_active_joined_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                fields=["status", "date_joined", "id"],
+                name="users_user_status_joined_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                fields=["status", "type", "date_joined", "id"],
+                name="users_user_status_type_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                fields=["status", "email_notifications", "date_joined", "id"],
+                name="users_user_status_notify_idx",
+            ),
+        ),
+    ]
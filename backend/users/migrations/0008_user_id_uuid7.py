@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:07
+
+from django.db import migrations, models
+
+import core.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_user_list_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="id",
+            field=models.UUIDField(
+                default=core.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
@@ -1,19 +1,25 @@
-import uuid
-
-from django.contrib.auth.hashers import check_password, make_password
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+from core.emails import EmailQuerySet
+from core.hashing import password_hashing_pool
+from core.ids import uuid7
+
 from .utils import USER_TYPE_CHOICES
 
 
+def format_full_name(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+
 class User(models.Model):
     """
     Client User model - for external users/customers
     This is separate from teammates (internal team members)
     """
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     ACTIVE = "active"
     INACTIVE = "inactive"
@@ -51,15 +57,49 @@ class User(models.Model):
     # Preferences
     email_notifications = models.BooleanField(default=True)
 
+    objects = EmailQuerySet.as_manager()
+
     class Meta:
         db_table = "users_user"
         ordering = ["-date_joined"]
+        constraints = [
+            models.UniqueConstraint(Lower("email"), name="users_user_email_ci_unique"),
+        ]
+        # The user list is always filtered on status (active by default) and
+        # ordered by (-date_joined, -id) for keyset pagination. Each index
+        # leads with the equality filters of one access pattern and ends with
+        # that ordering, so pages are read in order without a sort.
+        indexes = [
+            # Keyset pagination / date_joined range without status (admin)
+            models.Index(fields=["date_joined", "id"], name="users_user_joined_id_idx"),
+            # Default list: active users (most rows, smallest index)
+            models.Index(
+                fields=["date_joined", "id"],
+                condition=models.Q(status="active"),
+                name="users_user_active_joined_idx",
+            ),
+            # Other statuses
+            models.Index(
+                fields=["status", "date_joined", "id"],
+                name="users_user_status_joined_idx",
+            ),
+            # status + type (+ email_notifications, checked on the rows)
+            models.Index(
+                fields=["status", "type", "date_joined", "id"],
+                name="users_user_status_type_idx",
+            ),
+            # status + email_notifications
+            models.Index(
+                fields=["status", "email_notifications", "date_joined", "id"],
+                name="users_user_status_notify_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
 
     def get_full_name(self):
-        return f"{self.first_name} {self.last_name}".strip()
+        return format_full_name(self.first_name, self.last_name)
 
     def get_short_name(self):
         return self.first_name
@@ -70,14 +110,20 @@ class User(models.Model):
 
     def set_password(self, raw_password):
         if raw_password:
-            self.password = make_password(raw_password)
+            self.password = password_hashing_pool.make_password(raw_password)
         else:
             self.password = None
 
     def check_password(self, raw_password):
         if not self.password:
             return False
-        return check_password(raw_password, self.password)
+
+        def setter(raw_password):
+            # Upgrade hashes made with an older hasher or a lower cost
+            self.set_password(raw_password)
+            self.save(update_fields=["password"])
+
+        return password_hashing_pool.check_password(raw_password, self.password, setter)
 
     def has_usable_password(self):
         return bool(self.password)
@@ -100,3 +146,39 @@ class User(models.Model):
     def get_username(self):
         """Return email as username for JWT compatibility"""
         return self.email
+
+
+class RevokedToken(models.Model):
+    """
+    A single revoked JWT, identified by its jti claim
+    Rows are only needed until the token would have expired anyway
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    user_id = models.UUIDField(blank=True, null=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = "users_revoked_token"
+
+    def __str__(self):
+        return self.jti
+
+
+class TokenRevocationWatermark(models.Model):
+    """
+    Per-user cut-off: every token of this user issued before `not_before` is
+    invalid. Used for password changes and deactivations. Applies to both
+    client users and teammates, so it holds the id rather than a foreign key.
+    """
+
+    user_id = models.UUIDField(primary_key=True)
+    not_before = models.DateTimeField()
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = "users_token_revocation_watermark"
+
+    def __str__(self):
+        return f"{self.user_id} < {self.not_before.isoformat()}"
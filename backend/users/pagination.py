@@ -0,0 +1,11 @@
+from django.conf import settings
+
+from core.pagination import KeysetPagination
+
+
+class UserListPagination(KeysetPagination):
+    """Newest users first; see the User.Meta indexes"""
+
+    ordering = ("-date_joined", "-id")
+    page_size = getattr(settings, "USER_LIST_PAGE_SIZE", 50)
+    max_page_size = getattr(settings, "USER_LIST_MAX_PAGE_SIZE", 500)
@@ -0,0 +1,69 @@
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+
+from rest_framework import serializers
+
+FUZZY = "fuzzy"
+PREFIX = "prefix"
+
+# Columns covered by the trigram GIN indexes of migration 0006. The indexes
+# are on UPPER(column) so Django's icontains/istartswith lookups (which
+# compare UPPER(column)) can use them as well as the trigram operators.
+SEARCH_COLUMNS = ("first_name", "last_name", "email")
+
+
+class UserSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(min_length=2, max_length=100, trim_whitespace=True)
+    mode = serializers.ChoiceField(choices=[FUZZY, PREFIX], default=FUZZY)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=20)
+
+
+def search_users(queryset, query, mode=FUZZY):
+    """
+    Users matching `query`, best match first, annotated with `rank`
+
+    fuzzy: trigram word similarity against first name, last name and email,
+    so typos and partial words match. prefix: any of the columns starts with
+    the query, for autocomplete. On PostgreSQL both are answered from the
+    pg_trgm GIN indexes; other backends fall back to (un-indexed) LIKE.
+    """
+    if connection.vendor == "postgresql":
+        queryset = _search_postgresql(queryset, query, mode)
+    else:
+        queryset = _search_fallback(queryset, query, mode)
+    return queryset.order_by("-rank", "-date_joined", "-id")
+
+
+def _search_postgresql(queryset, query, mode):
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    aliases = {f"{column}_upper": Upper(column) for column in SEARCH_COLUMNS}
+    queryset = queryset.alias(**aliases)
+    if mode == PREFIX:
+        condition = _any_column(query, "istartswith")
+    else:
+        condition = Q()
+        for alias in aliases:
+            condition |= Q(**{f"{alias}__trigram_word_similar": query})
+
+    rank = Greatest(*(TrigramWordSimilarity(query, F(alias)) for alias in aliases))
+    return queryset.filter(condition).annotate(rank=rank)
+
+
+def _search_fallback(queryset, query, mode):
+    lookup = "istartswith" if mode == PREFIX else "icontains"
+    rank = Case(
+        When(email__iexact=query, then=Value(1.0)),
+        When(_any_column(query, "istartswith"), then=Value(0.75)),
+        default=Value(0.5),
+        output_field=FloatField(),
+    )
+    return queryset.filter(_any_column(query, lookup)).annotate(rank=rank)
+
+
+def _any_column(query, lookup):
+    condition = Q()
+    for column in SEARCH_COLUMNS:
+        condition |= Q(**{f"{column}__{lookup}": query})
+    return condition
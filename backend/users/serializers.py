@@ -1,10 +1,20 @@
+from django.conf import settings
+
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+
+from core.emails import insert_with_unique_email
+from core.fieldsets import SparseFieldsetMixin
+from core.tokens import RefreshToken
 
-from .models import User
+from .filters import UserFilterSerializer
+from .models import User, format_full_name
 from .utils import USER_TYPE_CHOICES
 
+EMAIL_TAKEN = "A user with this email already exists."
+
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
 
     class Meta:
@@ -22,20 +32,50 @@ class UserSerializer(serializers.ModelSerializer):
             "type",
         ]
         read_only_fields = ["id", "date_joined"]
+        field_sources = {"full_name": ["first_name", "last_name"]}
 
     def get_full_name(self, obj):
         return obj.get_full_name()
 
+    # Used by the compiled serializer (core.compiled_serializers)
+    compile_full_name = staticmethod(format_full_name)
+
 
 class UserCreateSerializer(serializers.ModelSerializer):
+    # Declared so no UniqueValidator query runs: the INSERT checks uniqueness
+    email = serializers.EmailField(max_length=254)
+
     class Meta:
         model = User
         fields = ["email", "first_name", "last_name", "phone", "email_notifications"]
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
+    def create(self, validated_data):
+        return insert_with_unique_email(User(**validated_data), EMAIL_TAKEN)
+
+
+class UserImportSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk import (users.bulk_import). Email uniqueness is not
+    checked here: the importer checks a whole chunk with one query.
+    """
+
+    email = serializers.EmailField(max_length=254)
+    password = serializers.CharField(
+        write_only=True, min_length=8, required=False, allow_null=True
+    )
+
+    class Meta:
+        model = User
+        fields = [
+            "email",
+            "first_name",
+            "last_name",
+            "phone",
+            "type",
+            "email_notifications",
+            "password",
+        ]
+        validators = []
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
@@ -45,6 +85,7 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
+    email = serializers.EmailField(max_length=254)
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True)
 
@@ -59,14 +100,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             "password_confirm",
             "email_notifications",
             "type",
-            "id"
+            "id",
         ]
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
-
     def validate(self, attrs):
         if attrs["password"] != attrs["password_confirm"]:
             raise serializers.ValidationError("Passwords do not match.")
@@ -75,10 +111,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop("password_confirm")
         password = validated_data.pop("password")
-        user = User.objects.create(**validated_data)
+        # Hashed before the INSERT so the row is written once
+        user = User(**validated_data)
         user.set_password(password)
-        user.save()
-        return user
+        return insert_with_unique_email(user, EMAIL_TAKEN)
 
     def validate_type(self, value):
         """Prevent creating a user with type does match USER_TYPE_CHOICES"""
@@ -96,7 +132,7 @@ class UserAuthSerializer(serializers.Serializer):
         password = attrs.get("password")
 
         try:
-            user = User.objects.get(email=email, status=User.ACTIVE)
+            user = User.objects.by_email(email).get(status=User.ACTIVE)
         except User.DoesNotExist:
             raise serializers.ValidationError("Invalid email or password.")
 
@@ -118,7 +154,7 @@ class UserPasswordUpdateSerializer(serializers.Serializer):
         return attrs
 
     def validate_current_password(self, value):
-        user = self.context["request"].user
+        user = self.context.get("user") or self.context["request"].user
         if user.has_usable_password() and not user.check_password(value):
             raise serializers.ValidationError("Current password is incorrect.")
         return value
@@ -133,6 +169,72 @@ class UserTokenValidationSerializer(serializers.Serializer):
     type = serializers.CharField(read_only=True)
 
 
+class TokenBatchSerializer(serializers.Serializer):
+    tokens = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        max_length=settings.INTERNAL_BATCH_MAX_ITEMS,
+    )
+
+
+class UserBulkLookupSerializer(serializers.Serializer):
+    emails = serializers.ListField(child=serializers.EmailField(), required=False)
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+    def validate(self, attrs):
+        # Duplicates are dropped, keeping the caller's order
+        emails = list(dict.fromkeys(attrs.get("emails", [])))
+        ids = list(dict.fromkeys(attrs.get("ids", [])))
+        if not emails and not ids:
+            raise serializers.ValidationError("Provide at least one email or id.")
+        if len(emails) + len(ids) > settings.INTERNAL_BATCH_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {settings.INTERNAL_BATCH_MAX_ITEMS} emails and ids "
+                "can be looked up at once."
+            )
+        return {"emails": emails, "ids": ids}
+
+
+class UserBulkStatusSerializer(serializers.Serializer):
+    """
+    Body of the bulk status endpoint: the new status and either `ids` or
+    `filter` (the user list filters, e.g. {"type": "member"})
+    """
+
+    status = serializers.ChoiceField(choices=User.STATUS_CHOICES)
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+    filter = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Provide either ids or filter.")
+        if "ids" in attrs:
+            attrs["ids"] = list(dict.fromkeys(attrs["ids"]))
+            if not attrs["ids"]:
+                raise serializers.ValidationError({"ids": "Provide at least one id."})
+            if len(attrs["ids"]) > settings.USER_BULK_STATUS_MAX_IDS:
+                raise serializers.ValidationError(
+                    {
+                        "ids": f"At most {settings.USER_BULK_STATUS_MAX_IDS} ids "
+                        "can be updated at once; use a filter."
+                    }
+                )
+        return attrs
+
+    def validate_filter(self, value):
+        # Unknown keys would be dropped by the filter serializer, and a filter
+        # left empty matches every user
+        unknown = sorted(set(value) - set(UserFilterSerializer().fields))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown filters: {', '.join(unknown)}.")
+        filters = UserFilterSerializer(data=value)
+        if not filters.is_valid():
+            raise serializers.ValidationError(filters.errors)
+        if all(v is None for v in filters.validated_data.values()):
+            raise serializers.ValidationError("Provide at least one filter.")
+        return value
+
+
 class UserInitialPasswordSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(min_length=8)
@@ -144,7 +246,7 @@ class UserInitialPasswordSerializer(serializers.Serializer):
 
         email = attrs.get("email")
         try:
-            user = User.objects.get(email=email, status=User.ACTIVE)
+            user = User.objects.by_email(email).get(status=User.ACTIVE)
         except User.DoesNotExist:
             raise serializers.ValidationError("User not found or inactive.")
 
@@ -155,3 +257,18 @@ class UserInitialPasswordSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class UserLogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError:
+            raise serializers.ValidationError("Invalid refresh token.")
+
+        user = self.context["request"].user
+        if str(token.get("user_id")) != str(user.pk):
+            raise serializers.ValidationError("Invalid refresh token.")
+        return token
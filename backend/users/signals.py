@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.user_cache import invalidate_principal
+
+from .lookup_cache import invalidate_email_lookup
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_principal(instance.pk)
+    invalidate_email_lookup(instance)
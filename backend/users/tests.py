@@ -1,12 +1,59 @@
-from django.test import TestCase
-
+import csv
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import jwt
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from core.compiled_serializers import compile_serializer
+from core.counting import EstimatedCountPaginator, count_queryset, estimate_count
+from core.hashers import TunedScryptPasswordHasher
+from core.hashing import PasswordHashingPool
+from core.revocation import revocation_filter, revoke_token
+from core.user_cache import principal_cache
 from teammates.models import User as Teammate
-
-from .models import User
+from teammates.serializers import UserSerializer as TeammateSerializer
+
+from .bulk_status import set_users_status
+from .filters import filter_users
+from .jwt_serializers import CustomTokenObtainPairSerializer
+from .last_login import LastLoginBuffer
+from .lookup_cache import email_lookup_cache
+from .management.commands.benchmark_password_hashers import CANDIDATES
+from .middleware import (
+    InternalJWTAuthMiddleware,
+    internal_token_cache,
+    internal_token_failure_cache,
+)
+from .models import RevokedToken, TokenRevocationWatermark, User
+from .pagination import UserListPagination
+from .serializers import UserRegistrationSerializer, UserSerializer
 
 
 class UserModelTestCase(TestCase):
@@ -119,7 +166,9 @@ class UserAPITestCase(APITestCase):
 
         # Assert response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+        self.assertIsNone(response.data["previous"])
 
     def test_create_user_duplicate_email(self):
         """Test creating user with duplicate email fails"""
@@ -339,6 +388,52 @@ class UserAuthenticationTestCase(APITestCase):
         self.assertTrue(user.check_password("newpass123"))
         self.assertFalse(user.check_password("oldpass123"))
 
+    def test_profile_update_keeps_changes_missing_from_cache(self):
+        """Test a profile update saves the current row, not the cached user"""
+        user = User.objects.create(email="stale@example.com", first_name="Old")
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.client.get(self.profile_url)
+        self.assertIsNotNone(principal_cache.get(str(user.pk)))
+
+        # Another worker changes the row; this worker's cache is not told
+        User.objects.filter(pk=user.pk).update(last_name="Changed", phone="+15550100")
+        response = self.client.patch(self.profile_url, {"first_name": "New"})
+
+        # Assert the other change survives and the cached user is dropped
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, "New")
+        self.assertEqual(user.last_name, "Changed")
+        self.assertEqual(user.phone, "+15550100")
+        self.assertIsNone(principal_cache.get(str(user.pk)))
+
+    def test_password_update_keeps_changes_missing_from_cache(self):
+        """Test a password update only writes the password"""
+        user = User.objects.create(email="stalepw@example.com", first_name="Old")
+        user.set_password("oldpass123")
+        user.save()
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.client.get(self.profile_url)
+
+        User.objects.filter(pk=user.pk).update(first_name="Changed")
+        response = self.client.put(
+            self.password_url,
+            {
+                "current_password": "oldpass123",
+                "new_password": "newpass123",
+                "new_password_confirm": "newpass123",
+            },
+        )
+
+        # Assert the password changed and the other change survives
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password("newpass123"))
+        self.assertEqual(user.first_name, "Changed")
+        self.assertIsNone(principal_cache.get(str(user.pk)))
+
     def test_token_validation_endpoint(self):
         """Test token validation for inter-service communication"""
         # Create and authenticate user
@@ -380,3 +475,2131 @@ class UserAuthenticationTestCase(APITestCase):
         # Test token validation without auth
         response = self.client.get(self.validate_token_url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(JWT_TRUST_CLAIMS=True)
+class ClaimsTrustedAuthenticationTestCase(APITestCase):
+    """Test cases for claims-only authentication on read endpoints"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR CLAIMS-TRUSTED AUTHENTICATION")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up test data before each test"""
+        principal_cache.clear()
+        revocation_filter.sync()
+        self.validate_token_url = "/api/users/validate-token/"
+        self.profile_url = "/api/users/me/"
+        self.user = User.objects.create(
+            email="claims@example.com", first_name="Claims", last_name="User"
+        )
+        refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.access_token = str(refresh.access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+    def test_validate_token_without_database(self):
+        """Test token introspection is answered from the claims alone"""
+        with self.assertNumQueries(0):
+            response = self.client.get(self.validate_token_url)
+
+        # Assert response matches the database-backed payload
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user_type"], "client")
+        self.assertEqual(response.data["user"]["user_id"], str(self.user.id))
+        self.assertEqual(response.data["user"]["email"], self.user.email)
+        self.assertEqual(response.data["user"]["full_name"], "Claims User")
+        self.assertTrue(response.data["user"]["is_active"])
+
+    def test_validate_teammate_token_without_database(self):
+        """Test teammate tokens are introspected from the claims alone"""
+        teammate = Teammate.objects.create_user(
+            email="teammate@example.com", name="Test Teammate", password="pass1234"
+        )
+        refresh = CustomTokenObtainPairSerializer.get_token(teammate)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.validate_token_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user_type"], "teammate")
+        self.assertEqual(response.data["user"]["name"], "Test Teammate")
+
+    def test_profile_loads_instance_lazily(self):
+        """Test the profile view loads the user only when it needs the row"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.profile_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], self.user.email)
+
+    def test_legacy_token_falls_back_to_database(self):
+        """Test tokens without identity claims are resolved from the database"""
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+        response = self.client.get(self.validate_token_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"]["email"], self.user.email)
+
+
+class TokenRevocationTestCase(APITestCase):
+    """Test cases for revoking tokens before they expire"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR TOKEN REVOCATION")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up test data before each test"""
+        principal_cache.clear()
+        revocation_filter.reset()
+        self.validate_token_url = "/api/users/validate-token/"
+        self.refresh_url = "/api/token/refresh/"
+        self.logout_url = "/api/users/logout/"
+        self.user = User.objects.create(
+            email="revoke@example.com", first_name="Revoke", last_name="Me"
+        )
+        self.user.set_password("oldpass123")
+        self.user.save()
+
+        # Issue the tokens a few seconds in the past, as a real session would be
+        self.refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.refresh["iat"] -= 10
+        self.access = self.refresh.access_token
+        self.access["iat"] -= 10
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    @override_settings(JWT_TRUST_CLAIMS=True)
+    def test_deactivation_revokes_tokens(self):
+        """Test deactivating a user rejects its tokens even when claims are trusted"""
+        teammate = Teammate.objects.create_user(
+            email="teammate@example.com", name="Teammate", password="password123"
+        )
+        teammate_token = RefreshToken.for_user(teammate).access_token
+
+        response = self.client.delete(
+            f"/api/users/{self.user.id}/",
+            HTTP_AUTHORIZATION=f"Bearer {teammate_token}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.validate_token_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_update_revokes_tokens(self):
+        """Test changing the password rejects tokens issued before the change"""
+        response = self.client.put(
+            "/api/users/me/password/",
+            {
+                "current_password": "oldpass123",
+                "new_password": "newpass123",
+                "new_password_confirm": "newpass123",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.validate_token_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(self.refresh_url, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revokes_refresh_and_access_tokens(self):
+        """Test logout revokes both tokens of the session"""
+        response = self.client.post(self.logout_url, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Assert both tokens stopped working
+        response = self.client.post(self.refresh_url, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(self.validate_token_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocations_from_other_workers_are_synced(self):
+        """Test the filter picks up revocations written by other processes"""
+        revocation_filter.sync()
+        RevokedToken.objects.create(
+            jti=self.access["jti"],
+            user_id=self.user.id,
+            expires_at=self.access.current_time + self.access.lifetime,
+        )
+        self.assertFalse(revocation_filter.is_revoked(self.access.payload))
+
+        revocation_filter.sync()
+
+        # Assert the token is now rejected without another query
+        with self.assertNumQueries(0):
+            self.assertTrue(revocation_filter.is_revoked(self.access.payload))
+
+    def test_old_watermarks_are_dropped(self):
+        """Test watermarks older than any live token are pruned on sync"""
+        lifetime = settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"]
+        old = timezone.now() - lifetime - timedelta(minutes=1)
+        revocation_filter.add_watermark(uuid.uuid4(), old)
+        revocation_filter.add_watermark(self.user.id, timezone.now())
+
+        revocation_filter.sync()
+
+        # Assert only the recent watermark is kept
+        self.assertEqual(revocation_filter.stats()["watermarks"], 1)
+        self.assertTrue(revocation_filter.is_revoked(self.access.payload))
+
+
+class InternalTokenCacheTestCase(TestCase):
+    """Test cases for the verified service token cache"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR INTERNAL TOKEN CACHE")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up the middleware in front of a dummy view"""
+        internal_token_cache.clear()
+        internal_token_failure_cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = InternalJWTAuthMiddleware(lambda request: HttpResponse())
+        self.url = "/api/users/internal/metrics/"
+
+    def make_token(self, service, expires_in=60):
+        payload = {"service": service, "exp": int(time.time()) + expires_in}
+        return jwt.encode(payload, settings.INTERNAL_JWT_SECRET_KEY, "HS256")
+
+    def call(self, token):
+        request = self.factory.get(self.url, HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.middleware(request)
+
+    def test_valid_token_is_verified_once(self):
+        """Test repeated requests with the same token skip signature checks"""
+        token = self.make_token(settings.INTERNAL_JWT_ALLOWED_SERVICES[0])
+        hits = internal_token_cache.hits
+
+        with mock.patch("users.middleware.jwt.decode", wraps=jwt.decode) as decode:
+            for _ in range(3):
+                response = self.call(token)
+                self.assertEqual(response.status_code, 200)
+
+        # Assert only the first request decoded the token
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(internal_token_cache.hits - hits, 2)
+
+    def test_invalid_token_failure_is_cached(self):
+        """Test garbage tokens are rejected from the cache after the first try"""
+        with mock.patch("users.middleware.jwt.decode", wraps=jwt.decode) as decode:
+            for _ in range(3):
+                response = self.call("garbage.token.value")
+                self.assertEqual(response.status_code, 401)
+
+        # Assert response
+        self.assertEqual(decode.call_count, 1)
+        self.assertIn(b"Invalid token", response.content)
+
+    def test_garbage_tokens_do_not_evict_valid_ones(self):
+        """Test failures are cached apart from valid tokens"""
+        token = self.make_token(settings.INTERNAL_JWT_ALLOWED_SERVICES[0])
+        self.call(token)
+
+        for i in range(internal_token_cache.max_size + 1):
+            self.call(f"garbage.token.{i}")
+
+        # Assert the valid token is still served from its cache
+        with mock.patch("users.middleware.jwt.decode", wraps=jwt.decode) as decode:
+            response = self.call(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(decode.call_count, 0)
+        self.assertEqual(len(internal_token_cache), 1)
+        self.assertLessEqual(
+            len(internal_token_failure_cache), internal_token_failure_cache.max_size
+        )
+
+    def test_unauthorized_service_is_rejected(self):
+        """Test tokens for unknown services stay rejected when cached"""
+        token = self.make_token("unknown-service")
+
+        self.call(token)
+        response = self.call(token)
+
+        # Assert response
+        self.assertEqual(response.status_code, 401)
+        self.assertIn(b"Service unauthorized", response.content)
+
+    def test_valid_token_cached_no_longer_than_exp(self):
+        """Test cached entries never outlive the token itself"""
+        token = self.make_token(settings.INTERNAL_JWT_ALLOWED_SERVICES[0], 1)
+
+        with mock.patch.object(internal_token_cache, "set") as cache_set:
+            self.call(token)
+
+        # Assert the entry TTL is bounded by exp
+        self.assertLessEqual(cache_set.call_args.kwargs["ttl"], 1)
+
+
+class BatchTokenValidationTestCase(APITestCase):
+    """Test cases for the internal batch token validation endpoint"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR BATCH TOKEN VALIDATION")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up test data before each test"""
+        principal_cache.clear()
+        revocation_filter.sync()
+        self.url = "/api/users/internal/validate-tokens/"
+        self.users = [
+            User.objects.create(
+                email=f"batch{i}@example.com", first_name="Batch", last_name=str(i)
+            )
+            for i in range(3)
+        ]
+        self.teammate = Teammate.objects.create_user(
+            email="teammate@example.com", name="Test Teammate", password="pass1234"
+        )
+
+    def access_token(self, user):
+        return str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+    def test_batch_resolves_users_with_one_query_per_table(self):
+        """Test each user table is queried at most once for the whole batch"""
+        tokens = [self.access_token(user) for user in self.users]
+        tokens.append(self.access_token(self.teammate))
+        tokens.append(str(RefreshToken.for_user(self.users[0]).access_token))
+
+        with self.assertNumQueries(2):
+            response = self.client.post(self.url, {"tokens": tokens}, format="json")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result["valid"] for result in results))
+        self.assertEqual(results[0]["user"]["email"], "batch0@example.com")
+        self.assertEqual(results[3]["user_type"], "teammate")
+        self.assertEqual(results[4]["user"]["email"], "batch0@example.com")
+
+    def test_batch_reports_invalid_tokens_in_place(self):
+        """Test invalid, revoked and inactive entries fail individually"""
+        revoked = CustomTokenObtainPairSerializer.get_token(self.users[1]).access_token
+        revoke_token(revoked)
+        self.users[2].status = User.SUSPENDED
+        self.users[2].save()
+
+        tokens = [
+            self.access_token(self.users[0]),
+            "not-a-token",
+            str(revoked),
+            self.access_token(self.users[2]),
+        ]
+        response = self.client.post(self.url, {"tokens": tokens}, format="json")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [result["valid"] for result in results], [True, False, False, False]
+        )
+        self.assertEqual(results[2]["error"], "Token has been revoked")
+        self.assertEqual(results[3]["error"], "User not found")
+
+    def test_batch_requires_tokens(self):
+        """Test an empty batch is rejected"""
+        response = self.client.post(self.url, {"tokens": []}, format="json")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tokens", response.data)
+
+
+class BulkUserLookupTestCase(APITestCase):
+    """Test cases for the internal bulk user lookup endpoint"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR BULK USER LOOKUP")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up test data before each test"""
+        self.url = "/api/users/internal/bulk-lookup/"
+        self.alice = User.objects.create(
+            email="alice@example.com", first_name="Alice", last_name="A"
+        )
+        self.bob = User.objects.create(
+            email="bob@example.com", first_name="Bob", last_name="B"
+        )
+
+    def test_lookup_by_emails_and_ids_in_one_query(self):
+        """Test emails and ids are resolved together with a single query"""
+        missing_id = "00000000-0000-0000-0000-000000000000"
+        data = {
+            "emails": ["alice@example.com", "nobody@example.com", "alice@example.com"],
+            "ids": [str(self.bob.id), missing_id],
+        }
+
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, data, format="json")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        found = response.data["found"]
+        self.assertEqual(set(found), {"alice@example.com", str(self.bob.id)})
+        self.assertEqual(found["alice@example.com"]["full_name"], "Alice A")
+        self.assertEqual(found[str(self.bob.id)]["email"], "bob@example.com")
+        self.assertEqual(response.data["not_found"], ["nobody@example.com", missing_id])
+
+    def test_lookup_requires_input(self):
+        """Test an empty lookup is rejected"""
+        response = self.client.post(self.url, {}, format="json")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(INTERNAL_BATCH_MAX_ITEMS=2)
+    def test_lookup_limit(self):
+        """Test lookups over the batch limit are rejected after deduplication"""
+        data = {"emails": ["a@example.com", "b@example.com", "a@example.com"]}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data["ids"] = [str(self.bob.id)]
+        response = self.client.post(self.url, data, format="json")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CaseInsensitiveEmailTestCase(APITestCase):
+    """Test cases for case-insensitive email uniqueness and lookups"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR CASE-INSENSITIVE EMAILS")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up test data before each test"""
+        self.user = User.objects.create(
+            email="Mixed.Case@Example.com", first_name="Mixed", last_name="Case"
+        )
+        self.user.set_password("securepass123")
+        self.user.save()
+
+    def test_lookup_ignores_case(self):
+        """Test every casing of an email finds the same user with one query"""
+        with self.assertNumQueries(1):
+            user = User.objects.by_email("  mixed.case@EXAMPLE.COM ").get()
+
+        # Assert the stored casing is preserved
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, "Mixed.Case@Example.com")
+
+    def test_login_ignores_case(self):
+        """Test users can log in whatever casing they type"""
+        response = self.client.post(
+            "/api/users/login/",
+            {"email": "mixed.case@example.com", "password": "securepass123"},
+        )
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_by_email_endpoint_ignores_case(self):
+        """Test the internal by-email lookup ignores case"""
+        response = self.client.get(
+            "/api/users/internal/by-email/MIXED.CASE@example.com/"
+        )
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["id"], str(self.user.id))
+
+    def test_registration_rejects_case_variant(self):
+        """Test an email differing only by case counts as a duplicate"""
+        response = self.client.post(
+            "/api/users/internal/register/",
+            {
+                "email": "MIXED.CASE@EXAMPLE.COM",
+                "first_name": "Other",
+                "last_name": "User",
+                "password": "securepass123",
+                "password_confirm": "securepass123",
+            },
+        )
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("email", response.data)
+
+    def test_database_rejects_case_variant(self):
+        """Test the functional unique index enforces case-insensitive uniqueness"""
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                User.objects.create(
+                    email="mixed.case@example.com", first_name="A", last_name="B"
+                )
+
+
+class EmailLookupCacheTestCase(APITestCase):
+    """Test cases for the read-through cache of the by-email lookup"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR EMAIL LOOKUP CACHE")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up test data before each test"""
+        email_lookup_cache.clear()
+        self.user = User.objects.create(
+            email="cached@example.com", first_name="Cached", last_name="User"
+        )
+        self.url = "/api/users/internal/by-email/cached@example.com/"
+
+    def test_hit_skips_database(self):
+        """Test repeated lookups are served from the cache"""
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        # Assert the cached payload is the rendered response
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.json()["email"], "cached@example.com")
+
+    def test_not_found_is_cached_until_user_is_created(self):
+        """Test negative results are cached and dropped when the user appears"""
+        url = "/api/users/internal/by-email/new@example.com/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+        User.objects.create(email="New@example.com", first_name="N", last_name="U")
+        response = self.client.get(url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_save_invalidates_cached_payload(self):
+        """Test updates and email changes are never served stale"""
+        self.client.get(self.url)
+
+        self.user.first_name = "Renamed"
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()["first_name"], "Renamed")
+
+        self.user.email = "moved@example.com"
+        self.user.save()
+        response = self.client.get(self.url)
+
+        # Assert the old email no longer resolves
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_email_change_drops_only_the_old_entry(self):
+        """Test a save deletes the user's cached entry by key, not by scan"""
+        self.client.get(self.url)
+        self.client.get("/api/users/internal/by-email/other@example.com/")
+
+        self.user.email = "Moved@example.com"
+        with mock.patch.object(
+            email_lookup_cache, "delete", wraps=email_lookup_cache.delete
+        ) as delete:
+            self.user.save()
+
+        # Assert the new and the old email were the only keys deleted
+        self.assertEqual(
+            [args for args, _ in delete.call_args_list],
+            [("moved@example.com",), ("cached@example.com",)],
+        )
+        self.assertIsNone(email_lookup_cache.get("cached@example.com"))
+        self.assertIsNotNone(email_lookup_cache.get("other@example.com"))
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        "core.hashers.TunedScryptPasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ],
+    SCRYPT_WORK_FACTOR=2**10,
+)
+class PasswordRehashTestCase(APITestCase):
+    """Test cases for tunable hashers and rehash on login"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR PASSWORD REHASHING")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up users whose hashes were made with the legacy MD5 hasher"""
+        legacy_hash = make_password("securepass123", hasher="md5")
+        self.user = User.objects.create(
+            email="legacy@example.com",
+            first_name="Legacy",
+            last_name="Hash",
+            password=legacy_hash,
+        )
+        self.teammate = Teammate.objects.create(
+            email="legacy.teammate@example.com",
+            name="Legacy Teammate",
+            password=legacy_hash,
+        )
+
+    def test_client_login_upgrades_hash(self):
+        """Test a successful client login rehashes with the preferred hasher"""
+        response = self.client.post(
+            "/api/users/login/",
+            {"email": "legacy@example.com", "password": "securepass123"},
+        )
+
+        # Assert response and upgraded hash
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+        self.assertTrue(self.user.check_password("securepass123"))
+
+    def test_failed_login_keeps_hash(self):
+        """Test a wrong password leaves the stored hash alone"""
+        original = self.user.password
+
+        # Assert hash unchanged
+        self.assertFalse(self.user.check_password("wrongpass"))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, original)
+
+    def test_teammate_login_upgrades_hash(self):
+        """Test a successful teammate login rehashes with the preferred hasher"""
+        response = self.client.post(
+            "/api/token/",
+            {"email": "legacy.teammate@example.com", "password": "securepass123"},
+        )
+
+        # Assert response and upgraded hash
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.teammate.refresh_from_db()
+        self.assertTrue(self.teammate.password.startswith("scrypt$"))
+
+    def test_cost_increase_triggers_rehash(self):
+        """Test raising the configured work factor upgrades hashes on login"""
+        self.user.set_password("securepass123")
+        self.user.save()
+        self.assertIn("$1024$", self.user.password)
+
+        with override_settings(SCRYPT_WORK_FACTOR=2**11):
+            self.assertTrue(self.user.check_password("securepass123"))
+
+        # Assert hash stored with the new cost
+        self.user.refresh_from_db()
+        self.assertIn("$2048$", self.user.password)
+
+    def test_cost_decrease_still_verifies_old_hashes(self):
+        """Test hashes made at a higher cost log in and are rehashed lower"""
+        with override_settings(SCRYPT_WORK_FACTOR=2**12):
+            self.user.set_password("securepass123")
+        self.user.save()
+
+        response = self.client.post(
+            "/api/users/login/",
+            {"email": "legacy@example.com", "password": "securepass123"},
+        )
+
+        # Assert response and hash stored with the lowered cost
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertIn("$1024$", self.user.password)
+
+    def test_benchmark_command_recommends_cost(self):
+        """Test the benchmark reports percentiles and a recommendation"""
+        candidates = (TunedScryptPasswordHasher, [{"work_factor": 2**10}])
+        out = StringIO()
+        with mock.patch.dict(CANDIDATES, {"scrypt": candidates}):
+            call_command(
+                "benchmark_password_hashers",
+                hasher="scrypt",
+                samples=3,
+                target_ms=10000,
+                stdout=out,
+            )
+
+        # Assert output
+        self.assertIn("p99", out.getvalue())
+        self.assertIn("SCRYPT_WORK_FACTOR=1024", out.getvalue())
+
+
+class LastLoginBufferTestCase(APITestCase):
+    """Test cases for the write-behind last_login buffer"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR LAST LOGIN BUFFER")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up users and a buffer that only flushes when asked"""
+        self.users = [
+            User.objects.create(
+                email=f"buffer{i}@example.com", first_name="Buffer", last_name=str(i)
+            )
+            for i in range(3)
+        ]
+        self.buffer = LastLoginBuffer(
+            flush_size=10, flush_interval=3600, background=False
+        )
+
+    def test_flush_writes_all_users_in_one_query(self):
+        """Test pending timestamps are written with a single UPDATE"""
+        now = timezone.now()
+        for user in self.users:
+            self.buffer.record(user.pk, now)
+
+        # Assert nothing written before the flush
+        self.assertFalse(User.objects.filter(last_login__isnull=False).exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 3)
+
+        # Assert every user updated
+        self.assertEqual(User.objects.filter(last_login=now).count(), 3)
+        self.assertEqual(self.buffer.stats()["pending"], 0)
+
+    def test_coalesces_to_latest_timestamp(self):
+        """Test repeated logins keep only the latest timestamp"""
+        later = timezone.now()
+        earlier = later - timedelta(minutes=5)
+        self.buffer.record(self.users[0].pk, later)
+        self.buffer.record(self.users[0].pk, earlier)
+        self.buffer.flush()
+
+        # Assert latest timestamp stored
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].last_login, later)
+        self.assertEqual(self.buffer.stats()["flushed_rows"], 1)
+
+    def test_flushes_when_size_reached(self):
+        """Test recording the flush_size-th user triggers a flush"""
+        self.buffer.flush_size = 2
+        now = timezone.now()
+        self.buffer.record(self.users[0].pk, now)
+        self.buffer.record(self.users[1].pk, now)
+
+        # Assert written without an explicit flush
+        self.assertEqual(User.objects.filter(last_login=now).count(), 2)
+
+    def flush_threads(self, buffer):
+        """Threads that flushed `buffer` after one login was recorded"""
+        flushed = threading.Event()
+        threads = []
+
+        def flush():
+            threads.append(threading.current_thread())
+            flushed.set()
+
+        with mock.patch.object(buffer, "flush", side_effect=flush):
+            buffer.record(self.users[0].pk, timezone.now())
+            self.assertTrue(flushed.wait(5))
+            buffer._stop.set()
+            buffer._wake.set()
+            buffer._thread.join(5)
+        return threads
+
+    def test_overdue_flush_runs_on_the_thread(self):
+        """Test a login past the interval wakes the thread instead of flushing"""
+        buffer = LastLoginBuffer(flush_size=10, flush_interval=3600)
+        buffer._next_flush = time.monotonic() - 1
+
+        # Assert flushed once, by the background thread, not the login
+        self.assertEqual(self.flush_threads(buffer), [buffer._thread])
+
+    def test_full_flush_runs_on_the_thread(self):
+        """Test a login filling the buffer wakes the thread instead of flushing"""
+        buffer = LastLoginBuffer(flush_size=1, flush_interval=3600)
+
+        # Assert flushed once, by the background thread, not the login
+        self.assertEqual(self.flush_threads(buffer), [buffer._thread])
+
+    def test_close_flushes_pending(self):
+        """Test the atexit hook writes what is still buffered"""
+        now = timezone.now()
+        self.buffer.record(self.users[0].pk, now)
+
+        self.buffer.close()
+
+        # Assert written on shutdown
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].last_login, now)
+        self.assertEqual(self.buffer.stats()["pending"], 0)
+
+    def test_failed_flush_requeues(self):
+        """Test timestamps survive a failed flush and are written later"""
+        now = timezone.now()
+        self.buffer.record(self.users[0].pk, now)
+        with (
+            mock.patch.object(
+                User.objects, "filter", side_effect=DatabaseError("down")
+            ),
+            self.assertLogs("users.last_login", "ERROR"),
+        ):
+            self.assertEqual(self.buffer.flush(), 0)
+
+        # Assert requeued and written on the next flush
+        self.assertEqual(self.buffer.stats()["pending"], 1)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].last_login, now)
+
+    def test_login_does_not_save_full_row(self):
+        """Test login records last_login without a full-row save"""
+        self.users[0].set_password("securepass123")
+        self.users[0].save()
+
+        with mock.patch.object(User, "save") as save:
+            response = self.client.post(
+                "/api/users/login/",
+                {"email": "buffer0@example.com", "password": "securepass123"},
+            )
+
+        # Assert response and last_login written through the buffer
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        save.assert_not_called()
+        self.users[0].refresh_from_db()
+        self.assertIsNotNone(self.users[0].last_login)
+
+
+class UserListPaginationTestCase(APITestCase):
+    """Test cases for keyset pagination of the user list"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR USER LIST PAGINATION")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up users, several sharing a date_joined, and teammate auth"""
+        teammate = Teammate.objects.create_user(
+            email="pager@example.com", name="Pager", password="securepass123"
+        )
+        token = RefreshToken.for_user(teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        joined = timezone.now()
+        for i in range(8):
+            User.objects.create(
+                email=f"page{i}@example.com",
+                first_name="Page",
+                last_name=str(i),
+                # Pairs of users share a timestamp so the id breaks ties
+                date_joined=joined - timedelta(minutes=i // 2),
+            )
+        self.expected = [
+            str(pk)
+            for pk in User.objects.order_by("-date_joined", "-id").values_list(
+                "id", flat=True
+            )
+        ]
+
+    def walk(self, url, link):
+        """Follow `link` from url, returning each page's ids and the last response"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([user["id"] for user in response.data["results"]])
+            url = response.data[link]
+        return pages, response
+
+    def test_next_links_visit_every_user_once(self):
+        """Test following next links returns every user in order"""
+        pages, last = self.walk("/api/users/?page_size=3", "next")
+
+        # Assert pages cover the ordering exactly
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertIsNotNone(last.data["previous"])
+
+    def test_previous_links_walk_back(self):
+        """Test previous links return the earlier pages in the same order"""
+        pages, last = self.walk("/api/users/?page_size=3", "next")
+        back, first = self.walk(last.data["previous"], "previous")
+
+        # Assert the earlier pages are reproduced
+        self.assertEqual(back, [pages[1], pages[0]])
+        self.assertIsNone(first.data["previous"])
+
+    def test_cursor_is_opaque(self):
+        """Test the cursor exposes no raw ids and rejects tampering"""
+        response = self.client.get("/api/users/?page_size=3")
+        next_url = response.data["next"]
+
+        # Assert opaque cursor and invalid cursors rejected
+        self.assertNotIn(self.expected[2], next_url)
+        response = self.client.get("/api/users/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_size_is_capped(self):
+        """Test page_size falls back to the default or the maximum"""
+        with mock.patch.object(UserListPagination, "max_page_size", 5):
+            response = self.client.get("/api/users/?page_size=1000")
+
+        # Assert capped page
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_deep_page_costs_the_same(self):
+        """Test a later page runs the same queries as the first"""
+        first = self.client.get("/api/users/?page_size=2")
+        with CaptureQueriesContext(connection) as first_page:
+            self.client.get("/api/users/?page_size=2")
+        with CaptureQueriesContext(connection) as deep_page:
+            self.client.get(first.data["next"])
+
+        # Assert no extra queries (the count is only run on the first page)
+        # and no OFFSET
+        self.assertEqual(len(first_page) - 1, len(deep_page))
+        self.assertNotIn("OFFSET", deep_page.captured_queries[-1]["sql"])
+
+
+class UserExportTestCase(APITestCase):
+    """Test cases for the streaming user export"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR USER EXPORT")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up users with varied status, type and join date"""
+        teammate = Teammate.objects.create_user(
+            email="exporter@example.com", name="Exporter", password="securepass123"
+        )
+        token = RefreshToken.for_user(teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.export_url = "/api/users/export/"
+
+        now = timezone.now()
+        self.old_admin = User.objects.create(
+            email="old.admin@example.com",
+            first_name="Old",
+            last_name="Admin",
+            type="admin",
+            date_joined=now - timedelta(days=30),
+        )
+        self.new_member = User.objects.create(
+            email="new.member@example.com", first_name="New", last_name="Member"
+        )
+        self.suspended = User.objects.create(
+            email="suspended@example.com",
+            first_name="Sus",
+            last_name="Pended",
+            status=User.SUSPENDED,
+            password="hashed",
+        )
+
+    def read(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        """Test NDJSON export streams one object per user"""
+        response = self.client.get(self.export_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            {row["email"] for row in rows},
+            {
+                "old.admin@example.com",
+                "new.member@example.com",
+                "suspended@example.com",
+            },
+        )
+        self.assertTrue(all("password" not in row for row in rows))
+
+    def test_csv_export_with_filters(self):
+        """Test CSV export applies status and type filters"""
+        response = self.client.get(
+            self.export_url, {"output": "csv", "status": "active", "type": "admin"}
+        )
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('filename="users.csv"', response["Content-Disposition"])
+        rows = list(csv.DictReader(self.read(response).splitlines()))
+        self.assertEqual([row["email"] for row in rows], ["old.admin@example.com"])
+        self.assertEqual(rows[0]["id"], str(self.old_admin.id))
+
+    def test_date_joined_range(self):
+        """Test date_joined range filters are half-open"""
+        cutoff = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = self.client.get(self.export_url, {"date_joined_before": cutoff})
+
+        # Assert only the old user exported
+        rows = self.read(response).splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0])["id"], str(self.old_admin.id))
+
+    def test_invalid_parameters(self):
+        """Test unknown formats and filter values are rejected"""
+        response = self.client.get(self.export_url, {"output": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.export_url, {"status": "deleted"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        """Test anonymous clients cannot export users"""
+        self.client.credentials()
+        response = self.client.get(self.export_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_client_users_forbidden(self):
+        """Test client users cannot export other clients"""
+        token = CustomTokenObtainPairSerializer.get_token(self.new_member).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.get(self.export_url)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_command(self):
+        """Test the management command streams the same rows"""
+        out = StringIO()
+        call_command("export_users", status="suspended", chunk_size=1, stdout=out)
+
+        # Assert output
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row["email"] for row in rows], ["suspended@example.com"])
+
+    def test_export_command_rejects_bad_filter(self):
+        """Test invalid command filters raise a CommandError"""
+        with self.assertRaises(CommandError):
+            call_command("export_users", type="robot", stdout=StringIO())
+
+
+class SparseFieldsetTestCase(APITestCase):
+    """Test cases for ?fields= / ?exclude= on user read endpoints"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR SPARSE FIELDSETS")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up a user and teammate auth"""
+        teammate = Teammate.objects.create_user(
+            email="sparse@example.com", name="Sparse", password="securepass123"
+        )
+        token = RefreshToken.for_user(teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.user = User.objects.create(
+            email="narrow@example.com",
+            first_name="Narrow",
+            last_name="Client",
+            phone="+1234567890",
+        )
+
+    def test_list_fields_narrows_output_and_select(self):
+        """Test ?fields= trims the rendered fields and the selected columns"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/users/", {"fields": "id,email"})
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [{"id": str(self.user.id), "email": "narrow@example.com"}],
+        )
+        # Assert the user query skipped unrequested columns
+        user_sql = queries.captured_queries[-1]["sql"]
+        self.assertIn('"users_user"."email"', user_sql)
+        self.assertNotIn('"users_user"."phone"', user_sql)
+        self.assertNotIn('"users_user"."password"', user_sql)
+
+    def test_method_field_loads_its_sources(self):
+        """Test full_name alone renders without deferred per-row loads"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/users/", {"fields": "full_name"})
+
+        # Assert response and a single users row query (besides the count)
+        self.assertEqual(response.data["results"], [{"full_name": "Narrow Client"}])
+        user_queries = [
+            query
+            for query in queries.captured_queries
+            if 'FROM "users_user"' in query["sql"] and "COUNT(" not in query["sql"]
+        ]
+        self.assertEqual(len(user_queries), 1)
+
+    def test_detail_exclude(self):
+        """Test ?exclude= drops fields from the detail response"""
+        response = self.client.get(
+            f"/api/users/{self.user.id}/", {"exclude": "phone,full_name"}
+        )
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("phone", response.data)
+        self.assertNotIn("full_name", response.data)
+        self.assertEqual(response.data["email"], "narrow@example.com")
+
+    def test_unknown_field_rejected(self):
+        """Test unknown field names return 400"""
+        response = self.client.get("/api/users/", {"fields": "id,password"})
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("password", str(response.data["fields"]))
+
+    def test_writes_ignore_fields(self):
+        """Test ?fields= does not affect update responses"""
+        response = self.client.patch(
+            f"/api/users/{self.user.id}/?fields=id", {"first_name": "Wide"}
+        )
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["first_name"], "Wide")
+
+
+class CompiledSerializerTestCase(APITestCase):
+    """Conformance of the compiled serializers with the DRF serializers"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR COMPILED SERIALIZERS")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up users covering nulls, unicode and sub-second timestamps"""
+        joined = timezone.now().replace(microsecond=123456)
+        User.objects.create(
+            email="plain@example.com", first_name="Plain", last_name="User"
+        )
+        User.objects.create(
+            email="full@example.com",
+            first_name="Zoë",
+            last_name="",
+            phone="+441234567",
+            type="admin",
+            status=User.SUSPENDED,
+            email_notifications=False,
+            date_joined=joined.replace(microsecond=0),
+        )
+        User.objects.create(
+            email="micro@example.com",
+            first_name="  Micro",
+            last_name="秒",
+            date_joined=joined - timedelta(days=400),
+        )
+        Teammate.objects.create_user(
+            email="compiled.teammate@example.com",
+            name="Compiled Teammate",
+            password="securepass123",
+        )
+        self.renderer = JSONRenderer()
+
+    def assertRendersIdentically(self, serializer_class, queryset, fields=None):
+        compiled = compile_serializer(serializer_class, fields)
+        expected = serializer_class(queryset, many=True, context={"request": None}).data
+        if fields is not None:
+            expected = [{name: row[name] for name in fields} for row in expected]
+        actual = compiled.serialize(compiled.values(queryset))
+        self.assertEqual(self.renderer.render(actual), self.renderer.render(expected))
+
+    def test_user_serializer_parity(self):
+        """Test compiled UserSerializer output is byte-identical"""
+        self.assertRendersIdentically(UserSerializer, User.objects.order_by("email"))
+
+    def test_parity_in_other_timezone(self):
+        """Test datetimes are converted to the active timezone like DRF does"""
+        with timezone.override("America/New_York"):
+            self.assertRendersIdentically(
+                UserSerializer, User.objects.order_by("email")
+            )
+
+    def test_field_subset_parity(self):
+        """Test a sparse field subset keeps the serializer's field order"""
+        self.assertRendersIdentically(
+            UserSerializer, User.objects.order_by("email"), ("id", "full_name")
+        )
+
+    def test_teammate_serializer_parity(self):
+        """Test compiled teammate UserSerializer output is byte-identical"""
+        self.assertRendersIdentically(TeammateSerializer, Teammate.objects.all())
+
+    def test_list_endpoint_matches_serializer(self):
+        """Test the list endpoint renders what UserSerializer would"""
+        teammate = Teammate.objects.get(email="compiled.teammate@example.com")
+        token = RefreshToken.for_user(teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.get("/api/users/")
+
+        # Assert response
+        users = User.objects.filter(status=User.ACTIVE).order_by("-date_joined", "-id")
+        self.assertEqual(
+            self.renderer.render(response.data["results"]),
+            self.renderer.render(UserSerializer(users, many=True).data),
+        )
+
+    def test_benchmark_command(self):
+        """Test the benchmark runs, checks parity and leaves no rows behind"""
+        out = StringIO()
+        call_command("benchmark_user_serializers", sizes=[5], repeat=1, stdout=out)
+
+        # Assert output and rollback
+        self.assertIn("speedup", out.getvalue())
+        self.assertEqual(User.objects.count(), 3)
+
+
+class UserSearchTestCase(APITestCase):
+    """Test cases for the teammate user search (SQLite fallback path)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR USER SEARCH")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up users to search and teammate auth"""
+        teammate = Teammate.objects.create_user(
+            email="searcher@example.com", name="Searcher", password="securepass123"
+        )
+        token = RefreshToken.for_user(teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.search_url = "/api/users/search/"
+
+        self.jonathan = User.objects.create(
+            email="jonathan@example.com", first_name="Jonathan", last_name="Smith"
+        )
+        self.jones = User.objects.create(
+            email="ann@example.com", first_name="Ann", last_name="Jones", type="admin"
+        )
+        self.mojo = User.objects.create(
+            email="mojo@example.com",
+            first_name="Mo",
+            last_name="Bojon",
+            status=User.SUSPENDED,
+        )
+
+    def emails(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [user["email"] for user in response.data["results"]]
+
+    def test_search_ranks_prefix_matches_first(self):
+        """Test matches at the start of a column rank above inner matches"""
+        response = self.client.get(self.search_url, {"q": "jon"})
+
+        # Assert all matches, prefix matches first
+        emails = self.emails(response)
+        self.assertEqual(set(emails[:2]), {"jonathan@example.com", "ann@example.com"})
+        self.assertEqual(emails[2], "mojo@example.com")
+        ranks = [user["rank"] for user in response.data["results"]]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_prefix_mode(self):
+        """Test autocomplete mode only returns prefix matches"""
+        response = self.client.get(self.search_url, {"q": "jon", "mode": "prefix"})
+
+        # Assert inner match excluded
+        self.assertNotIn("mojo@example.com", self.emails(response))
+
+    def test_filters_and_limit(self):
+        """Test status/type filters and the result limit"""
+        response = self.client.get(
+            self.search_url, {"q": "jon", "status": "active", "type": "admin"}
+        )
+        self.assertEqual(self.emails(response), ["ann@example.com"])
+
+        response = self.client.get(self.search_url, {"q": "jon", "limit": 1})
+        self.assertEqual(len(self.emails(response)), 1)
+
+    def test_sparse_fields(self):
+        """Test ?fields= narrows results, rank is always included"""
+        response = self.client.get(
+            self.search_url, {"q": "jonathan@example.com", "fields": "id"}
+        )
+
+        # Assert response
+        self.assertEqual(
+            response.data["results"], [{"id": str(self.jonathan.id), "rank": 1.0}]
+        )
+
+    def test_invalid_query(self):
+        """Test too short queries and unknown modes are rejected"""
+        response = self.client.get(self.search_url, {"q": "j"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.search_url, {"q": "jon", "mode": "regex"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_client_users_forbidden(self):
+        """Test client users cannot search other clients"""
+        token = CustomTokenObtainPairSerializer.get_token(self.jonathan).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.get(self.search_url, {"q": "jon"})
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class UserListFilterTestCase(APITestCase):
+    """Test cases for user list filters and their indexes"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR USER LIST FILTERS")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up users across statuses, types and join dates"""
+        teammate = Teammate.objects.create_user(
+            email="filterer@example.com", name="Filterer", password="securepass123"
+        )
+        token = RefreshToken.for_user(teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        now = timezone.now()
+        User.objects.create(
+            email="active.member@example.com", first_name="A", last_name="M"
+        )
+        User.objects.create(
+            email="active.admin@example.com",
+            first_name="A",
+            last_name="A",
+            type="admin",
+            email_notifications=False,
+            date_joined=now - timedelta(days=60),
+        )
+        User.objects.create(
+            email="suspended.owner@example.com",
+            first_name="S",
+            last_name="O",
+            type="owner",
+            status=User.SUSPENDED,
+        )
+
+    def emails(self, params):
+        response = self.client.get("/api/users/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {user["email"] for user in response.data["results"]}
+
+    def test_defaults_to_active(self):
+        """Test the list only shows active users unless asked otherwise"""
+        self.assertEqual(
+            self.emails({}), {"active.member@example.com", "active.admin@example.com"}
+        )
+        self.assertEqual(
+            self.emails({"status": "suspended"}), {"suspended.owner@example.com"}
+        )
+
+    def test_type_notifications_and_dates(self):
+        """Test type, email_notifications and date_joined filters"""
+        self.assertEqual(self.emails({"type": "admin"}), {"active.admin@example.com"})
+        self.assertEqual(
+            self.emails({"email_notifications": "false"}),
+            {"active.admin@example.com"},
+        )
+        cutoff = (timezone.now() - timedelta(days=30)).isoformat()
+        self.assertEqual(
+            self.emails({"date_joined_after": cutoff}), {"active.member@example.com"}
+        )
+
+    def test_invalid_filter(self):
+        """Test invalid filter values return 400"""
+        response = self.client.get("/api/users/", {"type": "robot"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # SQLite's planner only: it picks indexes without table statistics, so
+    # the plans are stable on the tiny test table. PostgreSQL plans depend on
+    # the statistics of a real table and are not covered here.
+    @skipUnless(connection.vendor == "sqlite", "asserts SQLite EXPLAIN output")
+    def test_every_filter_combination_uses_an_index(self):
+        """Test SQLite's EXPLAIN shows an index for each filter combination"""
+        values = {
+            "status": "suspended",
+            "type": "admin",
+            "email_notifications": "true",
+            "date_joined_after": "2024-01-01",
+            "date_joined_before": "2030-01-01",
+        }
+        names = list(values)
+        for size in range(len(names) + 1):
+            for combination in itertools.combinations(names, size):
+                params = {name: values[name] for name in combination}
+                queryset = filter_users(
+                    User.objects.all(), params, default_status=User.ACTIVE
+                ).order_by("-date_joined", "-id")[:50]
+                plan = queryset.explain()
+
+                # Assert an index search that also yields the page order
+                with self.subTest(filters=combination):
+                    self.assertRegex(plan, r"USING (COVERING )?INDEX users_user_")
+                    self.assertNotRegex(plan, r"SCAN users_user\s*$")
+                    self.assertNotIn("TEMP B-TREE", plan)
+
+
+class EstimatedCountTestCase(APITestCase):
+    """Test cases for planner-estimated counts on paginated lists"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR ESTIMATED COUNTS")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up a superuser teammate and a few users"""
+        self.teammate = Teammate.objects.create_superuser(
+            email="counter@example.com", name="Counter", password="securepass123"
+        )
+        token = RefreshToken.for_user(self.teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        for i in range(3):
+            User.objects.create(
+                email=f"counted{i}@example.com", first_name="C", last_name=str(i)
+            )
+
+    def test_no_estimate_outside_postgres(self):
+        """Test that other backends fall back to an exact count"""
+        # Assert no estimate on SQLite, so counts are exact
+        self.assertIsNone(estimate_count(User.objects.all()))
+        self.assertEqual(count_queryset(User.objects.all()), (3, True))
+
+    def test_list_reports_exact_count(self):
+        """Test that small lists carry an exact count"""
+        response = self.client.get("/api/users/", {"page_size": 2})
+
+        # Assert the count covers every page and is exact
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertTrue(response.data["count_is_exact"])
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_list_count_respects_filters(self):
+        """Test that the count is of the filtered rows"""
+        User.objects.filter(email="counted0@example.com").update(status=User.SUSPENDED)
+        response = self.client.get("/api/users/")
+
+        # Assert the suspended user is not counted
+        self.assertEqual(response.data["count"], 2)
+
+    def test_cursor_pages_carry_count(self):
+        """Test following a link reuses the first page's count"""
+        first = self.client.get("/api/users/", {"page_size": 2})
+        User.objects.create(email="late@example.com", first_name="L", last_name="L")
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(first.data["next"])
+
+        # Assert no COUNT on the cursor page and the same count and flag
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+        self.assertEqual(second.data["count"], 3)
+        self.assertTrue(second.data["count_is_exact"])
+        self.assertEqual(len(second.data["results"]), 1)
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=1000)
+    def test_large_estimate_skips_count(self):
+        """Test that estimates above the threshold are used as they are"""
+        with mock.patch("core.counting.estimate_count", return_value=250000):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/api/users/")
+
+        # Assert the estimate is returned and no COUNT(*) was run
+        self.assertEqual(response.data["count"], 250000)
+        self.assertFalse(response.data["count_is_exact"])
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=1000)
+    def test_small_estimate_is_counted(self):
+        """Test that estimates below the threshold are replaced by COUNT(*)"""
+        with mock.patch("core.counting.estimate_count", return_value=10):
+            count = count_queryset(User.objects.all())
+
+        # Assert the exact count wins
+        self.assertEqual(count, (3, True))
+
+    def test_paginator_uses_estimate(self):
+        """Test that EstimatedCountPaginator flags estimated counts"""
+        paginator = EstimatedCountPaginator(User.objects.order_by("email"), 2)
+        paginator.count_threshold = 1000
+        with mock.patch("core.counting.estimate_count", return_value=5000):
+            # Assert the estimate drives the page count
+            self.assertEqual(paginator.count, 5000)
+            self.assertFalse(paginator.count_is_exact)
+            self.assertEqual(paginator.num_pages, 2500)
+
+    def test_admin_changelist_uses_estimated_paginator(self):
+        """Test that the user admin changelist pages with estimated counts"""
+        self.client.force_login(self.teammate)
+        response = self.client.get("/admin/users/user/")
+
+        # Assert the changelist renders with the estimating paginator
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        paginator = response.context["cl"].paginator
+        self.assertIsInstance(paginator, EstimatedCountPaginator)
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.count_is_exact)
+
+
+class BulkImportTestCase(APITestCase):
+    """Test cases for the bulk user import"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR BULK USER IMPORT")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up an existing user and a clean lookup cache"""
+        email_lookup_cache.clear()
+        self.import_url = "/api/users/internal/import/"
+        User.objects.create(
+            email="Existing@Example.com", first_name="Old", last_name="User"
+        )
+
+    def post_ndjson(self, rows, **params):
+        body = "".join(
+            row if isinstance(row, str) else json.dumps(row) + "\n" for row in rows
+        )
+        url = self.import_url
+        if params:
+            url += "?" + "&".join(f"{key}={value}" for key, value in params.items())
+        return self.client.post(url, body, content_type="application/x-ndjson")
+
+    def test_ndjson_import(self):
+        """Test NDJSON rows are created with defaults and hashed passwords"""
+        response = self.post_ndjson(
+            [
+                {"email": "new1@example.com", "first_name": "New", "last_name": "1"},
+                {
+                    "email": "new2@example.com",
+                    "first_name": "New",
+                    "last_name": "2",
+                    "type": "admin",
+                    "password": "securepass123",
+                },
+            ]
+        )
+
+        # Assert response and created users
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"created": 2, "failed": 0, "errors": []})
+        first = User.objects.get(email="new1@example.com")
+        self.assertEqual(first.type, "member")
+        self.assertTrue(first.email_notifications)
+        self.assertIsNone(first.password)
+        second = User.objects.get(email="new2@example.com")
+        self.assertEqual(second.type, "admin")
+        self.assertTrue(second.check_password("securepass123"))
+
+    def test_csv_import(self):
+        """Test CSV rows treat empty cells as not given"""
+        body = (
+            "email,first_name,last_name,phone,email_notifications,password\n"
+            "csv1@example.com,Csv,One,,false,\n"
+            'csv2@example.com,"Two, Jr",Csv,555-0100,,\n'
+        )
+        response = self.client.post(
+            f"{self.import_url}?input=csv", body, content_type="text/csv"
+        )
+
+        # Assert response and created users
+        self.assertEqual(response.data["created"], 2)
+        first = User.objects.get(email="csv1@example.com")
+        self.assertFalse(first.email_notifications)
+        self.assertIsNone(first.phone)
+        second = User.objects.get(email="csv2@example.com")
+        self.assertEqual(second.first_name, "Two, Jr")
+        self.assertEqual(second.phone, "555-0100")
+
+    def test_per_row_errors(self):
+        """Test invalid and duplicate rows are reported without stopping"""
+        response = self.post_ndjson(
+            [
+                {"email": "existing@example.com", "first_name": "A", "last_name": "B"},
+                "not json\n",
+                {"email": "bad", "first_name": "A", "last_name": "B", "type": "x"},
+                {"email": "ok@example.com", "first_name": "A", "last_name": "B"},
+                {"email": "OK@example.com", "first_name": "A", "last_name": "B"},
+                "[1, 2]\n",
+            ]
+        )
+
+        # Assert one created user and one error per rejected row, by row
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["failed"], 5)
+        errors = {error["row"]: error for error in response.data["errors"]}
+        self.assertEqual(list(errors), [1, 2, 3, 5, 6])
+        self.assertIn("already exists", errors[1]["errors"]["email"][0])
+        self.assertIn("non_field_errors", errors[2]["errors"])
+        self.assertEqual(set(errors[3]["errors"]), {"email", "type"})
+        self.assertIn("earlier in the import", errors[5]["errors"]["email"][0])
+        self.assertEqual(errors[5]["email"], "OK@example.com")
+        self.assertTrue(User.objects.filter(email="ok@example.com").exists())
+
+    @override_settings(USER_IMPORT_CHUNK_SIZE=2)
+    def test_one_dedupe_query_per_chunk(self):
+        """Test emails are checked once per chunk and across chunks"""
+        rows = [
+            {"email": f"chunk{i % 4}@example.com", "first_name": "C", "last_name": "C"}
+            for i in range(6)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_ndjson(rows)
+
+        # Assert 3 chunks, 3 dedupe queries, repeats of earlier chunks rejected
+        dedupe_queries = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and "LOWER(" in query["sql"]
+        ]
+        self.assertEqual(len(dedupe_queries), 3)
+        self.assertEqual(response.data["created"], 4)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [5, 6])
+
+    def test_concurrent_insert_is_reported(self):
+        """Test rows skipped by the insert (a race) are reported, not counted"""
+        with mock.patch.object(
+            User.objects, "by_emails", return_value=User.objects.none()
+        ):
+            response = self.post_ndjson(
+                [
+                    {
+                        "email": "Existing@Example.com",
+                        "first_name": "A",
+                        "last_name": "B",
+                    },
+                    {"email": "race@example.com", "first_name": "A", "last_name": "B"},
+                ]
+            )
+
+        # Assert the conflicting row is an error and the other one is created
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["row"], 1)
+        self.assertEqual(User.objects.filter(first_name="A").count(), 1)
+
+    def test_invalidates_negative_lookup(self):
+        """Test cached "not found" lookups of imported emails are dropped"""
+        self.client.get("/api/users/internal/by-email/late@example.com/")
+        self.assertIsNotNone(email_lookup_cache.get("late@example.com"))
+
+        self.post_ndjson(
+            [{"email": "Late@example.com", "first_name": "L", "last_name": "Late"}]
+        )
+        response = self.client.get("/api/users/internal/by-email/late@example.com/")
+
+        # Assert the new user is found
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unknown_input_format(self):
+        """Test unknown input formats are rejected"""
+        response = self.post_ndjson([], input="xml")
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_command(self):
+        """Test the management command imports a file and reports errors"""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as source:
+            source.write("email,first_name,last_name\n")
+            source.write("cmd@example.com,Cmd,User\n")
+            source.write("existing@example.com,Dup,User\n")
+        out, err = StringIO(), StringIO()
+        try:
+            call_command(
+                "import_users", source.name, input="csv", stdout=out, stderr=err
+            )
+        finally:
+            os.unlink(source.name)
+
+        # Assert summary and error output
+        self.assertIn("Created 1 users, rejected 1 rows", out.getvalue())
+        self.assertIn("row 2 (existing@example.com)", err.getvalue())
+        self.assertTrue(User.objects.filter(email="cmd@example.com").exists())
+
+    def test_import_command_hashes_on_every_worker(self):
+        """Test --workers hashes that many passwords at once"""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as source:
+            source.write("email,first_name,last_name,password\n")
+            for i in range(20):
+                source.write(f"worker{i}@example.com,W,{i},securepass{i}\n")
+        pools = []
+
+        def make_pool(**kwargs):
+            pools.append(PasswordHashingPool(**kwargs))
+            return pools[-1]
+
+        try:
+            with mock.patch(
+                "users.management.commands.import_users.PasswordHashingPool",
+                side_effect=make_pool,
+            ):
+                call_command(
+                    "import_users",
+                    source.name,
+                    input="csv",
+                    workers=2,
+                    stdout=StringIO(),
+                )
+        finally:
+            os.unlink(source.name)
+
+        # Assert passwords hashed two at a time and the workers stopped
+        self.assertGreater(pools[0].stats()["peak_pending"], 1)
+        self.assertEqual(pools[0].stats()["completed"], 20)
+        self.assertIsNone(pools[0]._executor)
+        self.assertTrue(
+            User.objects.get(email="worker3@example.com").check_password("securepass3")
+        )
+
+    def test_import_command_without_passwords_starts_no_workers(self):
+        """Test --workers starts no processes when nothing is hashed"""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as source:
+            source.write("email,first_name,last_name\nidle@example.com,I,W\n")
+        try:
+            with mock.patch("core.hashing.ProcessPoolExecutor") as executor_class:
+                call_command(
+                    "import_users",
+                    source.name,
+                    input="csv",
+                    workers=2,
+                    stdout=StringIO(),
+                )
+        finally:
+            os.unlink(source.name)
+
+        # Assert imported without creating a process pool
+        self.assertTrue(User.objects.filter(email="idle@example.com").exists())
+        executor_class.assert_not_called()
+
+    def test_import_command_missing_file(self):
+        """Test unreadable files raise a CommandError"""
+        with self.assertRaises(CommandError):
+            call_command("import_users", "/nonexistent/users.ndjson", stdout=StringIO())
+
+
+class BulkStatusTestCase(APITestCase):
+    """Test cases for bulk status transitions"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR BULK STATUS TRANSITIONS")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up a teammate, users and clean caches"""
+        principal_cache.clear()
+        email_lookup_cache.clear()
+        revocation_filter.reset()
+        self.url = "/api/users/bulk-status/"
+        self.teammate = Teammate.objects.create_superuser(
+            email="bulker@example.com", name="Bulker", password="securepass123"
+        )
+        token = RefreshToken.for_user(self.teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.members = [
+            User.objects.create(
+                email=f"member{i}@example.com", first_name="M", last_name=str(i)
+            )
+            for i in range(3)
+        ]
+        self.admin = User.objects.create(
+            email="admin@example.com", first_name="A", last_name="A", type="admin"
+        )
+        self.suspended = User.objects.create(
+            email="suspended@example.com",
+            first_name="S",
+            last_name="S",
+            status=User.SUSPENDED,
+        )
+
+    def statuses(self):
+        return dict(User.objects.values_list("email", "status"))
+
+    def test_ids_transition(self):
+        """Test an id list is suspended with counts for each outcome"""
+        ids = [str(self.members[0].id), str(self.suspended.id), str(uuid.uuid4())]
+        response = self.client.post(
+            self.url, {"status": "suspended", "ids": ids}, format="json"
+        )
+
+        # Assert counts and statuses
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {"status": "suspended", "matched": 2, "updated": 1, "not_found": 1},
+        )
+        statuses = self.statuses()
+        self.assertEqual(statuses["member0@example.com"], User.SUSPENDED)
+        self.assertEqual(statuses["member1@example.com"], User.ACTIVE)
+
+    def test_filter_transition_single_update(self):
+        """Test a filter is applied with one SELECT and one UPDATE"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url,
+                {
+                    "status": "inactive",
+                    "filter": {"status": "active", "type": "member"},
+                },
+                format="json",
+            )
+
+        # Assert only the active members changed, in one UPDATE
+        self.assertEqual(response.data["updated"], 3)
+        updates = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "users_user"')
+        ]
+        self.assertEqual(len(updates), 1)
+        statuses = self.statuses()
+        self.assertEqual(statuses["admin@example.com"], User.ACTIVE)
+        self.assertEqual(statuses["member2@example.com"], User.INACTIVE)
+
+    def test_update_targets_the_locked_ids(self):
+        """Test the UPDATE is by the locked ids, not a re-run of the filter"""
+        late = []
+
+        def insert_before_update(execute, sql, params, many, context):
+            if sql.startswith('UPDATE "users_user"') and not late:
+                # Another request creates a matching user after the lock
+                late.append(
+                    User.objects.create(
+                        email="late@example.com", first_name="L", last_name="M"
+                    )
+                )
+            return execute(sql, params, many, context)
+
+        queryset = User.objects.filter(type="member", status=User.ACTIVE)
+        with connection.execute_wrapper(insert_before_update):
+            result = set_users_status(queryset, User.INACTIVE)
+
+        # Assert only the locked users changed
+        self.assertEqual(result, {"matched": 3, "updated": 3})
+        late[0].refresh_from_db()
+        self.assertEqual(late[0].status, User.ACTIVE)
+
+    def test_filter_transition_in_chunks(self):
+        """Test a large match is locked and updated a chunk at a time"""
+        with CaptureQueriesContext(connection) as queries:
+            result = set_users_status(
+                User.objects.filter(status=User.ACTIVE), User.INACTIVE, chunk_size=2
+            )
+
+        # Assert every active user changed, two per UPDATE
+        self.assertEqual(result, {"matched": 4, "updated": 4})
+        updates = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "users_user"')
+        ]
+        self.assertEqual(len(updates), 2)
+        self.assertFalse(User.objects.filter(status=User.ACTIVE).exists())
+        self.assertEqual(TokenRevocationWatermark.objects.count(), 4)
+
+    def test_revokes_tokens_and_invalidates_caches(self):
+        """Test deactivated users lose their tokens and cached entries"""
+        user = self.members[0]
+        access = CustomTokenObtainPairSerializer.get_token(user).access_token
+        access["iat"] -= 10
+        principal_cache.set(str(user.id), user)
+        email_lookup_cache.set(user.email, (200, b"{}", user.id))
+
+        self.client.post(
+            self.url, {"status": "inactive", "ids": [str(user.id)]}, format="json"
+        )
+
+        # Assert tokens revoked and caches dropped
+        self.assertTrue(revocation_filter.is_revoked(access.payload))
+        self.assertTrue(
+            TokenRevocationWatermark.objects.filter(user_id=user.id).exists()
+        )
+        self.assertIsNone(principal_cache.get(str(user.id)))
+        self.assertIsNone(email_lookup_cache.get(user.email))
+
+    def test_reactivation_keeps_tokens(self):
+        """Test moving users back to active revokes nothing"""
+        response = self.client.post(
+            self.url,
+            {"status": "active", "ids": [str(self.suspended.id)]},
+            format="json",
+        )
+
+        # Assert reactivated without a watermark
+        self.assertEqual(response.data["updated"], 1)
+        self.assertFalse(TokenRevocationWatermark.objects.exists())
+
+    def test_invalid_bodies(self):
+        """Test ids/filter must be given exactly once and filters validated"""
+        bodies = [
+            {"status": "inactive"},
+            {"status": "inactive", "ids": [str(self.admin.id)], "filter": {"a": 1}},
+            {"status": "inactive", "filter": {}},
+            {"status": "inactive", "filter": {"type": "robot"}},
+            {"status": "deleted", "ids": [str(self.admin.id)]},
+        ]
+        for body in bodies:
+            response = self.client.post(self.url, body, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Assert filter errors are nested under "filter" and nothing changed
+        response = self.client.post(
+            self.url, {"status": "inactive", "filter": {"type": "robot"}}, format="json"
+        )
+        self.assertIn("type", response.data["filter"])
+        self.assertEqual(self.statuses()["admin@example.com"], User.ACTIVE)
+
+    def test_unknown_filter_key_rejected(self):
+        """Test a misspelled filter key is rejected, not dropped"""
+        response = self.client.post(
+            self.url,
+            {"status": "suspended", "filter": {"staus": "active"}},
+            format="json",
+        )
+
+        # Assert rejected and nobody suspended
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("staus", str(response.data["filter"]))
+        self.assertEqual(self.statuses()["admin@example.com"], User.ACTIVE)
+
+    def test_filter_of_only_nulls_rejected(self):
+        """Test a filter with no value left after validation is rejected"""
+        response = self.client.post(
+            self.url,
+            {"status": "suspended", "filter": {"email_notifications": None}},
+            format="json",
+        )
+
+        # Assert rejected and nobody suspended
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.statuses()["admin@example.com"], User.ACTIVE)
+
+    def test_requires_teammate(self):
+        """Test anonymous clients cannot change statuses"""
+        self.client.credentials()
+        response = self.client.post(
+            self.url, {"status": "inactive", "ids": [str(self.admin.id)]}, format="json"
+        )
+
+        # Assert rejected
+        self.assertIn(
+            response.status_code,
+            [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN],
+        )
+
+    def test_admin_action(self):
+        """Test the admin action suspends the selected users"""
+        self.client.force_login(self.teammate)
+        response = self.client.post(
+            "/admin/users/user/",
+            {
+                "action": "make_suspended",
+                "_selected_action": [str(user.id) for user in self.members[:2]],
+            },
+            follow=True,
+        )
+
+        # Assert statuses and message
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = self.statuses()
+        self.assertEqual(statuses["member0@example.com"], User.SUSPENDED)
+        self.assertEqual(statuses["member2@example.com"], User.ACTIVE)
+        messages = [str(message) for message in response.context["messages"]]
+        self.assertIn("2 users set to suspended, 0 already were.", messages)
+
+
+class SingleRoundTripCreateTestCase(APITestCase):
+    """Test cases for creating users with one INSERT and no pre-check"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR SINGLE ROUND TRIP CREATE")
+        print("=" * 50)
+
+    def setUp(self):
+        """Set up registration data"""
+        self.register_url = "/api/users/internal/register/"
+        self.data = {
+            "email": "once@example.com",
+            "first_name": "Once",
+            "last_name": "Only",
+            "password": "securepass123",
+            "password_confirm": "securepass123",
+        }
+
+    def user_queries(self, queries):
+        return [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"users_user"' in query["sql"]
+        ]
+
+    def test_registration_is_one_insert(self):
+        """Test signup writes the row once with the password already hashed"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.register_url, self.data)
+
+        # Assert a single INSERT and a usable password
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = self.user_queries(queries)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('INSERT INTO "users_user"'))
+        user = User.objects.get(email="once@example.com")
+        self.assertTrue(user.check_password("securepass123"))
+
+    def test_teammate_create_is_one_insert(self):
+        """Test the teammate create endpoint skips the exists() check"""
+        teammate = Teammate.objects.create_user(
+            email="creator@example.com", name="Creator", password="securepass123"
+        )
+        token = RefreshToken.for_user(teammate).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/users/",
+                {"email": "made@example.com", "first_name": "M", "last_name": "U"},
+            )
+
+        # Assert a single INSERT on the users table
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = self.user_queries(queries)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('INSERT INTO "users_user"'))
+
+    def test_duplicate_maps_to_validation_error(self):
+        """Test a duplicate email is the same 400 the pre-check gave"""
+        User.objects.create(email="Once@Example.com", first_name="A", last_name="B")
+        response = self.client.post(self.register_url, self.data)
+
+        # Assert response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["email"], ["A user with this email already exists."]
+        )
+
+    def test_interleaved_signups_create_one_user(self):
+        """Test two signups validated before either inserts leave one user"""
+        first = UserRegistrationSerializer(data=self.data)
+        second = UserRegistrationSerializer(
+            data={**self.data, "email": "ONCE@example.com"}
+        )
+
+        # Both pass validation, as they would when racing
+        self.assertTrue(first.is_valid())
+        self.assertTrue(second.is_valid())
+
+        first.save()
+        with self.assertRaises(ValidationError) as raised:
+            second.save()
+
+        # Assert the loser gets the email error and the transaction survives
+        self.assertIn("email", raised.exception.detail)
+        self.assertEqual(User.objects.by_email("once@example.com").count(), 1)
+
+    def test_other_integrity_errors_propagate(self):
+        """Test only email clashes are turned into validation errors"""
+        serializer = UserRegistrationSerializer(data=self.data)
+        serializer.is_valid(raise_exception=True)
+        error = IntegrityError("NOT NULL constraint failed: users_user.first_name")
+
+        with mock.patch.object(User, "save", side_effect=error):
+            with self.assertRaises(IntegrityError):
+                serializer.save()
+
+
+class AutocommitCreateTestCase(TransactionTestCase):
+    """Test cases for single-INSERT creation outside a transaction"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        print("\n" + "=" * 50)
+        print("🧪 RUNNING TESTS FOR AUTOCOMMIT CREATE")
+        print("=" * 50)
+
+    def test_no_savepoint_in_autocommit(self):
+        """Test the INSERT runs alone, and a clash is still a ValidationError"""
+        data = {
+            "email": "auto@example.com",
+            "first_name": "Auto",
+            "last_name": "Commit",
+            "password": "securepass123",
+            "password_confirm": "securepass123",
+        }
+        serializer = UserRegistrationSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as queries:
+            serializer.save()
+
+        # Assert one statement, no savepoint
+        self.assertEqual(len(queries.captured_queries), 1)
+
+        duplicate = UserRegistrationSerializer(
+            data={**data, "email": "AUTO@example.com"}
+        )
+        duplicate.is_valid(raise_exception=True)
+        with self.assertRaises(ValidationError):
+            duplicate.save()
+        self.assertEqual(User.objects.count(), 1)
@@ -9,15 +9,27 @@ internal_patterns = [
     path(
         "register/", views_internal.UserRegistrationView.as_view(), name="user-register"
     ),
+    path("bulk-lookup/", views_internal.bulk_lookup_users, name="user-bulk-lookup"),
+    path("import/", views_internal.bulk_import_users, name="user-bulk-import"),
+    path(
+        "validate-tokens/",
+        views_internal.validate_tokens,
+        name="user-validate-tokens",
+    ),
+    path("metrics/", views_internal.get_metrics, name="user-metrics"),
     # Add more internal endpoints here
 ]
 
 urlpatterns = [
     # Teammate-managed user endpoints (require teammate authentication)
     path("", views.UserListCreateView.as_view(), name="user-list-create"),
+    path("export/", views.UserExportView.as_view(), name="user-export"),
+    path("search/", views.UserSearchView.as_view(), name="user-search"),
+    path("bulk-status/", views.UserBulkStatusView.as_view(), name="user-bulk-status"),
     path("<uuid:pk>/", views.UserDetailView.as_view(), name="user-detail"),
     # User self-service authentication endpoints
     path("login/", views.UserLoginView.as_view(), name="user-login"),
+    path("logout/", views.UserLogoutView.as_view(), name="user-logout"),
     path(
         "set-password/",
         views.UserSetInitialPasswordView.as_view(),
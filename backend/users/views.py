@@ -1,17 +1,36 @@
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
 from rest_framework import generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from core.authentication import ClaimsJWTAuthentication, TokenPrincipal
+from core.compiled_serializers import compile_serializer
+from core.fieldsets import SparseFieldsetViewMixin
+from core.permissions import IsTeammate
+from core.principals import CLIENT, TEAMMATE, get_principal_kind
+from core.revocation import revoke_token, revoke_user_tokens
 from users.jwt_serializers import CustomTokenObtainPairSerializer
 
+from .bulk_status import set_users_status
+from .export import EXPORT_FORMATS, export_lines
+from .filters import filter_users
+from .last_login import last_login_buffer
 from .models import User
+from .pagination import UserListPagination
+from .search import UserSearchSerializer, search_users
 from .serializers import (
     UserAuthSerializer,
+    UserBulkStatusSerializer,
     UserCreateSerializer,
     UserInitialPasswordSerializer,
+    UserLogoutSerializer,
     UserPasswordUpdateSerializer,
     UserSerializer,
     UserTokenValidationSerializer,
@@ -19,32 +38,172 @@ from .serializers import (
 )
 
 
-class UserListCreateView(generics.ListCreateAPIView):
+def get_client_user(request, fresh=False):
+    """
+    Return the authenticated client user, loading it lazily when the request
+    was authenticated from token claims only. Teammates get a 404.
+
+    request.user may be a copy of a cached principal up to USER_CACHE_TTL
+    old; views that save the user pass `fresh=True` to get the current row,
+    so stale fields are never written back.
+    """
+    user = request.user
+    if isinstance(user, TokenPrincipal) and user.kind == CLIENT:
+        user = user.instance
+    if not isinstance(user, User):
+        raise NotFound("User not found")
+    if fresh:
+        try:
+            return User.objects.get(pk=user.pk)
+        except User.DoesNotExist:
+            raise NotFound("User not found")
+    return user
+
+
+class UserListCreateView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     """
     List all users or create a new user
     Requires authentication - only teammates can access
+    GET /api/users/?page_size=50 - Newest users first, paginated by cursor;
+    follow the `next`/`previous` links
+    GET /api/users/?fields=id,email (or ?exclude=...) - Only those fields
+    GET /api/users/?status=suspended&type=admin&email_notifications=true
+        &date_joined_after=2024-01-01&date_joined_before=2024-07-01
+        - Filters; status defaults to active
     """
 
-    queryset = User.objects.filter(status=User.ACTIVE)
+    queryset = User.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UserListPagination
+    # The pagination cursor reads the ordering columns of every page
+    sparse_required_fields = ("id", "date_joined")
 
     def get_serializer_class(self):
         if self.request.method == "POST":
             return UserCreateSerializer
         return UserSerializer
 
+    def filter_queryset(self, queryset):
+        return filter_users(
+            queryset, self.request.query_params, default_status=User.ACTIVE
+        )
+
+    def list(self, request, *args, **kwargs):
+        # Rendered from values() rows by the compiled UserSerializer, which
+        # gives the same output without building model instances
+        compiled = compile_serializer(
+            UserSerializer, UserSerializer.get_selected_fields(request)
+        )
+        queryset = compiled.values(
+            self.filter_queryset(self.get_queryset()), *self.sparse_required_fields
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(compiled.serialize(page))
+
     def perform_create(self, serializer):
         serializer.save(date_joined=timezone.now())
 
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserExportView(generics.GenericAPIView):
+    """
+    Stream every user matching the filters, for analytics jobs
+    Teammates only
+    GET /api/users/export/?output=ndjson|csv&status=&type=
+        &date_joined_after=&date_joined_before=
+    """
+
+    queryset = User.objects.all()
+    permission_classes = [IsTeammate]
+
+    def get(self, request, *args, **kwargs):
+        # `format` is taken by DRF's content negotiation, hence `output`
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"output": f"Choose one of: {', '.join(EXPORT_FORMATS)}."}
+            )
+        queryset = filter_users(self.get_queryset(), request.query_params)
+
+        response = StreamingHttpResponse(
+            export_lines(queryset, output), content_type=EXPORT_FORMATS[output]
+        )
+        response["Content-Disposition"] = f'attachment; filename="users.{output}"'
+        return response
+
+
+class UserSearchView(generics.GenericAPIView):
+    """
+    Search client users by name or email, best match first
+    Teammates only
+    GET /api/users/search/?q=jon&mode=fuzzy|prefix&limit=20&status=&type=
+    Each result is the user (?fields= / ?exclude= apply) plus its `rank`
+    """
+
+    queryset = User.objects.all()
+    permission_classes = [IsTeammate]
+
+    def get(self, request, *args, **kwargs):
+        params = UserSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+
+        queryset = filter_users(self.get_queryset(), request.query_params)
+        queryset = search_users(queryset, query["q"], query["mode"])
+        compiled = compile_serializer(
+            UserSerializer, UserSerializer.get_selected_fields(request)
+        )
+        rows = compiled.values(queryset, "rank")[: query["limit"]]
+
+        to_representation = compiled.bind()
+        results = [
+            {**to_representation(row), "rank": round(row["rank"], 4)} for row in rows
+        ]
+        return Response({"results": results})
+
+
+class UserBulkStatusView(generics.GenericAPIView):
+    """
+    Set the status of many users at once
+    Teammates only
+    POST /api/users/bulk-status/
+    Body: {"status": "suspended", "ids": [...]} or
+          {"status": "inactive", "filter": {"type": "member", ...}}
+    The filter takes the user list filters; without a status it matches
+    users of any status. Inactive/suspended users get their tokens revoked.
+    Returns {"status", "matched", "updated", "not_found"}
+    """
+
+    queryset = User.objects.all()
+    serializer_class = UserBulkStatusSerializer
+    permission_classes = [IsTeammate]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if "ids" in data:
+            queryset = self.get_queryset().filter(pk__in=data["ids"])
+        else:
+            queryset = filter_users(self.get_queryset(), data["filter"])
+
+        result = set_users_status(queryset, data["status"])
+        not_found = len(data["ids"]) - result["matched"] if "ids" in data else 0
+        return Response(
+            {"status": data["status"], **result, "not_found": not_found},
+            status=status.HTTP_200_OK,
+        )
+
+
+class UserDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a user
     Requires authentication - only teammates can access
-    GET /api/users/{id}/ - Get user details
+    GET /api/users/{id}/ - Get user details (?fields= / ?exclude= to narrow)
     PUT /api/users/{id}/ - Update user
     PATCH /api/users/{id}/ - Partial update user
-    DELETE /api/users/{id}/ - Delete user (sets status to inactive)
+    DELETE /api/users/{id}/ - Delete user (sets status to inactive and
+    revokes every token issued to it)
     """
 
     queryset = User.objects.all()
@@ -59,6 +218,7 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
         user = self.get_object()
         user.status = User.INACTIVE
         user.save()
+        revoke_user_tokens(user.id)
         return Response(
             {"message": "User deactivated successfully"}, status=status.HTTP_200_OK
         )
@@ -79,7 +239,7 @@ class UserLoginView(generics.GenericAPIView):
 
         user = serializer.validated_data["user"]
         user.last_login = timezone.now()
-        user.save()
+        last_login_buffer.record(user.pk, user.last_login)
 
         # Generate JWT tokens with custom claims
         refresh = CustomTokenObtainPairSerializer.get_token(user)
@@ -97,26 +257,19 @@ class UserLoginView(generics.GenericAPIView):
 class UserProfileView(generics.RetrieveUpdateAPIView):
     """
     User profile endpoint - allows users to view/update their own profile
-    GET /api/users/me/ - Get current user profile
+    GET /api/users/me/ - Get current user profile (?fields= / ?exclude=)
     PUT/PATCH /api/users/me/ - Update current user profile
     """
 
     serializer_class = UserSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        # Ensure the user is a User instance (not Teammate)
-        # Check if it's a client user by checking the model class name
-        if (
-            hasattr(self.request.user, "_meta")
-            and self.request.user._meta.app_label == "users"
-        ):
-            return self.request.user
-        else:
-            # If authenticated as teammate, raise error
-            from rest_framework.exceptions import NotFound
-
-            raise NotFound("User not found")
+        # Only client users have a profile here, teammates get a 404
+        return get_client_user(
+            self.request, fresh=self.request.method in ["PUT", "PATCH"]
+        )
 
     def get_serializer_class(self):
         if self.request.method in ["PUT", "PATCH"]:
@@ -128,35 +281,54 @@ class UserPasswordUpdateView(generics.UpdateAPIView):
     """
     User password update endpoint
     PUT /api/users/me/password/ - Update user password
+    Tokens issued before the change are revoked, so the user logs in again
     """
 
     serializer_class = UserPasswordUpdateSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        if (
-            hasattr(self.request.user, "_meta")
-            and self.request.user._meta.app_label == "users"
-        ):
-            return self.request.user
-        else:
-            from rest_framework.exceptions import NotFound
-
-            raise NotFound("User not found")
+        return get_client_user(self.request, fresh=True)
 
     def update(self, request, *args, **kwargs):
         user = self.get_object()
-        serializer = self.get_serializer(data=request.data)
+        serializer = self.get_serializer(
+            data=request.data, context={**self.get_serializer_context(), "user": user}
+        )
         serializer.is_valid(raise_exception=True)
 
         user.set_password(serializer.validated_data["new_password"])
-        user.save()
+        # Only the password: a concurrent profile update is kept
+        user.save(update_fields=["password"])
+        revoke_user_tokens(user.id)
 
         return Response(
             {"message": "Password updated successfully"}, status=status.HTTP_200_OK
         )
 
 
+class UserLogoutView(generics.GenericAPIView):
+    """
+    User logout endpoint - revokes the given refresh token and the access
+    token used for this request
+    POST /api/users/logout/ - Logout user
+    """
+
+    serializer_class = UserLogoutSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        revoke_token(serializer.validated_data["refresh"])
+        revoke_token(request.auth)
+
+        return Response(
+            {"message": "Logged out successfully"}, status=status.HTTP_200_OK
+        )
+
+
 class UserSetInitialPasswordView(generics.GenericAPIView):
     """
     Initial password setting endpoint - for users created without password
@@ -176,7 +348,7 @@ class UserSetInitialPasswordView(generics.GenericAPIView):
         user.set_password(password)
         user.save()
 
-        refresh = RefreshToken.for_user(user)
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
 
         return Response(
             {
@@ -189,18 +361,12 @@ class UserSetInitialPasswordView(generics.GenericAPIView):
         )
 
 
-@api_view(["GET"])
-@permission_classes([permissions.IsAuthenticated])
-def validate_user_token(request):
+def build_token_validation_payload(user):
     """
-    Token validation endpoint for inter-service communication
-    GET /api/users/validate-token/ - Validate JWT token and return user info
-    Used by projects-service to validate user tokens
+    Response body of the token validation endpoint for a teammate, client
+    user or claims-only TokenPrincipal
     """
-    user = request.user
-
-    # Check if it's a User (client) or Teammate
-    if isinstance(user, User):
+    if get_principal_kind(user) == CLIENT:
         serializer = UserTokenValidationSerializer(
             {
                 "user_id": user.id,
@@ -211,23 +377,31 @@ def validate_user_token(request):
                 "type": user.type,
             }
         )
-        return Response(
-            {"valid": True, "user_type": "client", "user": serializer.data},
-            status=status.HTTP_200_OK,
-        )
-    else:
-        # It's a teammate
-        return Response(
-            {
-                "valid": True,
-                "user_type": "teammate",
-                "user": {
-                    "user_id": user.id,
-                    "email": user.email,
-                    "name": user.name,
-                    "type": user.type,
-                    "is_active": True,
-                },
-            },
-            status=status.HTTP_200_OK,
-        )
+        return {"valid": True, "user_type": CLIENT, "user": serializer.data}
+
+    return {
+        "valid": True,
+        "user_type": TEAMMATE,
+        "user": {
+            "user_id": user.id,
+            "email": user.email,
+            "name": user.name,
+            "type": user.type,
+            "is_active": True,
+        },
+    }
+
+
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def validate_user_token(request):
+    """
+    Token validation endpoint for inter-service communication
+    GET /api/users/validate-token/ - Validate JWT token and return user info
+    Used by projects-service to validate user tokens
+    With JWT_TRUST_CLAIMS enabled this is answered from the token claims alone
+    """
+    return Response(
+        build_token_validation_payload(request.user), status=status.HTTP_200_OK
+    )
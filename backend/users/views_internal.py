@@ -1,7 +1,10 @@
+import codecs
 from urllib.parse import unquote
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
+from django.http import HttpResponse
 from django.utils import timezone
 
 from rest_framework import generics, permissions, status
@@ -10,11 +13,37 @@ from rest_framework.decorators import (
     authentication_classes,
     permission_classes,
 )
-from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
 
+from core.auth_backends import MultiUserBackend
+from core.compiled_serializers import compile_serializer
+from core.db import database_stats
+from core.emails import normalize_email
+from core.hashing import password_hashing_pool
+from core.principals import (
+    CLIENT,
+    PRINCIPAL_KIND_CLAIM,
+    TEAMMATE,
+    get_principal_kind,
+)
+from core.revocation import revocation_filter
+from core.tokens import AccessToken
+from core.user_cache import principal_cache
+
+from .bulk_import import IMPORT_FORMATS, import_users
+from .last_login import last_login_buffer
+from .lookup_cache import cache_email_lookup, email_lookup_cache
+from .middleware import internal_token_cache, internal_token_failure_cache
 from .models import User
-from .serializers import UserRegistrationSerializer, UserSerializer
+from .serializers import (
+    TokenBatchSerializer,
+    UserBulkLookupSerializer,
+    UserRegistrationSerializer,
+    UserSerializer,
+)
+from .views import build_token_validation_payload
 
 
 @api_view(["GET"])
@@ -24,6 +53,8 @@ def get_user_by_email(request, email):
     """
     Get user details by email
     GET /api/users/by-email/<email>/
+    Read-through cached: the rendered response (including "not found") is
+    reused until the user row changes or the entry expires
     """
     decoded_email = unquote(email)
     try:
@@ -32,11 +63,201 @@ def get_user_by_email(request, email):
         return Response(
             {"detail": "Invalid email format."}, status=status.HTTP_400_BAD_REQUEST
         )
+
+    key = normalize_email(decoded_email)
+    cached = email_lookup_cache.get(key)
+    if cached is None:
+        cached = render_user_by_email(decoded_email)
+        ttl = None if cached[2] else settings.USER_LOOKUP_NEGATIVE_TTL
+        cache_email_lookup(key, cached, ttl=ttl)
+
+    status_code, body, _ = cached
+    return HttpResponse(body, status=status_code, content_type="application/json")
+
+
+def render_user_by_email(email):
+    """Return (status_code, rendered body, user_id) for an email lookup"""
+    compiled = compile_serializer(UserSerializer)
     try:
-        user = User.objects.get(email=decoded_email)
+        user = compiled.values(User.objects.by_email(email)).get()
     except User.DoesNotExist:
-        raise NotFound("User not found.")
-    return Response(UserSerializer(user).data, status=status.HTTP_200_OK)
+        body = JSONRenderer().render({"detail": "User not found."})
+        return status.HTTP_404_NOT_FOUND, body, None
+    body = JSONRenderer().render(compiled.to_representation(user))
+    return status.HTTP_200_OK, body, user["id"]
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([])
+def bulk_lookup_users(request):
+    """
+    Get user details for many emails and/or ids in one query
+    POST /api/users/internal/bulk-lookup/
+    Body: {"emails": [...], "ids": [...]}
+    Returns {"found": {<email or id>: user}, "not_found": [<email or id>]}
+    """
+    serializer = UserBulkLookupSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    emails = serializer.validated_data["emails"]
+    ids = serializer.validated_data["ids"]
+
+    compiled = compile_serializer(UserSerializer)
+    users = list(
+        compiled.values(
+            User.objects.by_emails(emails) | User.objects.filter(pk__in=ids)
+        )
+    )
+    rendered = compiled.serialize(users)
+    by_email = {
+        normalize_email(user["email"]): data for user, data in zip(users, rendered)
+    }
+    by_id = {user["id"]: data for user, data in zip(users, rendered)}
+
+    found = {}
+    not_found = []
+    for email in emails:
+        if normalize_email(email) in by_email:
+            found[email] = by_email[normalize_email(email)]
+        else:
+            not_found.append(email)
+    for pk in ids:
+        if pk in by_id:
+            found[str(pk)] = by_id[pk]
+        else:
+            not_found.append(str(pk))
+
+    return Response({"found": found, "not_found": not_found}, status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([])
+def bulk_import_users(request):
+    """
+    Create many users from a CSV or NDJSON body, streamed
+    POST /api/users/internal/import/?input=ndjson|csv
+    Columns/keys: email, first_name, last_name, phone, type,
+    email_notifications, password (the last four optional)
+    Returns {"created": n, "failed": n, "errors": [{"row", "email", "errors"}]}
+    """
+    input_format = request.query_params.get("input", "ndjson")
+    if input_format not in IMPORT_FORMATS:
+        return Response(
+            {"input": f"Choose one of: {', '.join(IMPORT_FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    # The raw body, read line by line; request.data would load all of it
+    stream = request.stream or []
+    lines = codecs.iterdecode(stream, "utf-8-sig", errors="replace")
+    report = import_users(lines, input_format)
+    return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([])
+def validate_tokens(request):
+    """
+    Validate a batch of user access tokens
+    POST /api/users/internal/validate-tokens/
+    Body: {"tokens": ["<access token>", ...]}
+    Returns one result per token, in request order. Valid tokens get the same
+    payload as /api/users/validate-token/, invalid ones {"valid": false, "error"}.
+    Users are resolved with at most one IN query per user table.
+    """
+    serializer = TokenBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    tokens = [decode_access_token(raw) for raw in serializer.validated_data["tokens"]]
+    users = resolve_token_users(
+        [token for token in tokens if isinstance(token, AccessToken)]
+    )
+    return Response(
+        {"results": [build_batch_result(token, users) for token in tokens]},
+        status=status.HTTP_200_OK,
+    )
+
+
+def decode_access_token(raw_token):
+    """Return the validated AccessToken, or the reason it is not valid"""
+    try:
+        token = AccessToken(raw_token)
+    except TokenError as e:
+        return str(e)
+    if "user_id" not in token:
+        return "Token contained no recognizable user identification"
+    if revocation_filter.is_revoked(token.payload):
+        return "Token has been revoked"
+    return token
+
+
+def resolve_token_users(tokens):
+    """
+    Users behind the given tokens keyed by str(user_id). Cached principals
+    are reused; the rest is loaded with one IN query per table, using the
+    kind claim to skip the table a user cannot be in.
+    """
+    users = {}
+    missing = {}
+    for token in tokens:
+        user_id = str(token["user_id"])
+        user = principal_cache.get(user_id)
+        if user is not None:
+            users[user_id] = user
+        else:
+            missing[user_id] = token.get(PRINCIPAL_KIND_CLAIM)
+
+    backend = MultiUserBackend()
+    teammate_ids = [pk for pk, kind in missing.items() if kind != CLIENT]
+    users.update(backend.get_users(teammate_ids, TEAMMATE))
+    client_ids = [
+        pk for pk, kind in missing.items() if kind != TEAMMATE and pk not in users
+    ]
+    users.update(backend.get_users(client_ids, CLIENT))
+
+    for user_id in missing:
+        if user_id in users:
+            principal_cache.set(user_id, users[user_id])
+    return users
+
+
+def build_batch_result(token, users):
+    if not isinstance(token, AccessToken):
+        return {"valid": False, "error": token}
+
+    user = users.get(str(token["user_id"]))
+    kind = token.get(PRINCIPAL_KIND_CLAIM)
+    if (
+        user is None
+        or not user.is_active
+        or (kind is not None and kind != get_principal_kind(user))
+    ):
+        return {"valid": False, "error": "User not found"}
+    return build_token_validation_payload(user)
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([])
+def get_metrics(request):
+    """
+    In-process cache, hashing and database connection statistics for this worker
+    GET /api/users/internal/metrics/
+    """
+    return Response(
+        {
+            "principal_cache": principal_cache.stats(),
+            "token_revocation": revocation_filter.stats(),
+            "internal_token_cache": internal_token_cache.stats(),
+            "internal_token_failure_cache": internal_token_failure_cache.stats(),
+            "email_lookup_cache": email_lookup_cache.stats(),
+            "password_hashing": password_hashing_pool.stats(),
+            "last_login_buffer": last_login_buffer.stats(),
+            "database": database_stats(),
+        },
+        status=status.HTTP_200_OK,
+    )
 
 
 # User Authentication Views